@@ -1,20 +1,27 @@
 # audio_gui.py
-import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
+try:
+    import tkinter as tk
+    from tkinter import ttk, filedialog, messagebox
+except ImportError: # Python built without Tk: the headless CLI (run_cli) still works
+    tk = ttk = filedialog = messagebox = None
 import os
+import sys
+import argparse
+from pathlib import PurePath
 import threading
+import concurrent.futures
 import queue # For thread-safe GUI updates
 import time
+import traceback
+import atexit
+import logging
+import logging.handlers
 
-# Import the refactored processing function
-try:
-    # Ensure audio_processing.py is in the same directory or Python path
-    from audio_processing import process_audio
-    # srt_utils will be used indirectly by audio_processing
-    import srt_utils
-except ImportError as e:
-    messagebox.showerror("Import Error", f"Failed to import required modules: {e}\nMake sure audio_processing.py and srt_utils.py are present.")
-    exit()
+log = logging.getLogger(__name__)
+
+# audio_processing (and with it groq/dotenv/srt_utils) is imported lazily, in a
+# background thread once the window is up, so neither startup nor the first
+# Start click pays that import cost on the Tk thread.
 
 # Supported Languages (Add more as needed with their ISO 639-1 codes)
 SUPPORTED_LANGUAGES = {
@@ -28,12 +35,47 @@ SUPPORTED_LANGUAGES = {
     # Add other languages supported by Whisper/Groq
 }
 DEFAULT_LANGUAGE = "Japanese"
+# Dropdown values, built once at import
+_LANG_NAMES = tuple(SUPPORTED_LANGUAGES)
+
+# Groq Whisper models offered in the Model dropdown
+SUPPORTED_MODELS = ["whisper-large-v3", "whisper-large-v3-turbo"]
+# Turbo is much faster and cheaper on Groq with a small accuracy cost; pick whisper-large-v3 for the best quality
+DEFAULT_MODEL = "whisper-large-v3-turbo"
+
+# Max number of queued status messages rendered per drain
+STATUS_BATCH_LIMIT = 200
+# Max number of status messages held in the queue; oldest are dropped beyond this
+STATUS_QUEUE_MAXSIZE = 2000
+# Status log scrollback: once past the high-water mark, trim this many lines from the top
+STATUS_MAX_LINES = 5000
+STATUS_TRIM_LINES = 1000
+# Ctrl shortcuts the read-only status log still accepts: copy (Ctrl+C, Ctrl+Insert) and select all (Ctrl+A, Ctrl+/)
+STATUS_ALLOWED_CTRL_KEYS = frozenset({"c", "insert", "a", "slash"})
+# Number of files transcribed concurrently in a multi-file batch (Groq calls are I/O-bound)
+BATCH_MAX_WORKERS = 4
+# How a multi-file selection is displayed in the input entry
+BATCH_PATH_SEPARATOR = "; "
+# Default for the "Parallel Segments" spinbox and --parallel (segments sent to Groq at once)
+DEFAULT_PARALLEL_SEGMENTS = 4
+
+def parallel_segments_limit():
+    """
+    Upper bound for Parallel Segments and --parallel: audio_processing never runs more than
+    GROQ_MAX_PARALLEL_SEGMENTS uploads at once. Read when needed, after .env is loaded.
+    """
+    return max(1, int(os.getenv("GROQ_MAX_PARALLEL_SEGMENTS", "8")))
 
 
 class AudioProcessorApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Groq Audio Processor GUI")
+        # Cleared when the window closes; cheaper than a winfo_exists() Tcl round-trip per update
+        self._alive = True
+        self._busy = False # True while a job is being started or running
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.root.after_idle(self._preload_processing_module)
         # self.root.geometry("650x500") # Adjust size if needed
 
         # --- Variables ---
@@ -44,19 +86,28 @@ class AudioProcessorApp:
         self.delete_segments_var = tk.BooleanVar(value=True)
         self.delete_temp_audio_var = tk.BooleanVar(value=True)
         self.delete_segment_srts_var = tk.BooleanVar(value=True)
-        self.model_name_var = tk.StringVar(value="whisper-large-v3") # Keep model fixed for now
+        self.downsample_var = tk.BooleanVar(value=True)
+        self.model_name_var = tk.StringVar(value=DEFAULT_MODEL)
+        self.parallel_segments_var = tk.IntVar(value=min(DEFAULT_PARALLEL_SEGMENTS, parallel_segments_limit()))
+        self.batch_input_paths = [] # Set when several files are picked in the browse dialog
+
+        # Use a bounded queue for thread-safe status updates
+        self.status_queue = queue.Queue(maxsize=STATUS_QUEUE_MAXSIZE)
 
-        # Use a queue for thread-safe status updates
-        self.status_queue = queue.Queue()
+        # --- Styles ---
+        # Shared named styles, configured once instead of per widget
+        style = ttk.Style(root)
+        style.configure("App.TFrame", padding=10)
+        style.configure("App.TLabelframe", padding=10)
 
         # --- Layout ---
-        main_frame = ttk.Frame(root, padding="10")
+        main_frame = ttk.Frame(root, style="App.TFrame")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         root.columnconfigure(0, weight=1)
         root.rowconfigure(0, weight=1)
 
         # --- Input Section ---
-        input_frame = ttk.LabelFrame(main_frame, text="Input", padding="10")
+        input_frame = ttk.LabelFrame(main_frame, text="Input", style="App.TLabelframe")
         input_frame.grid(row=0, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         input_frame.columnconfigure(1, weight=1)
 
@@ -67,7 +118,7 @@ class AudioProcessorApp:
         self.browse_input_btn.grid(row=0, column=2, padx=5, pady=5)
 
         # --- Output Section ---
-        output_frame = ttk.LabelFrame(main_frame, text="Output", padding="10")
+        output_frame = ttk.LabelFrame(main_frame, text="Output", style="App.TLabelframe")
         output_frame.grid(row=1, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
         output_frame.columnconfigure(1, weight=1)
 
@@ -78,62 +129,86 @@ class AudioProcessorApp:
         self.browse_output_btn.grid(row=0, column=2, padx=5, pady=5)
 
         # --- Options Section ---
-        options_frame = ttk.LabelFrame(main_frame, text="Options", padding="10")
+        options_frame = ttk.LabelFrame(main_frame, text="Options", style="App.TLabelframe")
         options_frame.grid(row=2, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
 
         # Language Selection
         ttk.Label(options_frame, text="Language:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=2)
-        self.language_dropdown = ttk.Combobox(options_frame, textvariable=self.language_var, values=list(SUPPORTED_LANGUAGES.keys()), state="readonly")
+        self.language_dropdown = ttk.Combobox(options_frame, textvariable=self.language_var, values=_LANG_NAMES, state="readonly")
         self.language_dropdown.grid(row=0, column=1, sticky=tk.W, padx=5, pady=2)
         self.language_dropdown.set(DEFAULT_LANGUAGE) # Set default selection
 
+        # Parallel segment uploads
+        ttk.Label(options_frame, text="Parallel Segments:").grid(row=0, column=2, sticky=tk.W, padx=5, pady=2)
+        self.parallel_spinbox = ttk.Spinbox(options_frame, from_=1, to=parallel_segments_limit(), width=5, textvariable=self.parallel_segments_var)
+        self.parallel_spinbox.grid(row=0, column=3, sticky=tk.W, padx=5, pady=2)
+
+        # Model Selection
+        ttk.Label(options_frame, text="Model:").grid(row=1, column=0, sticky=tk.W, padx=5, pady=2)
+        self.model_dropdown = ttk.Combobox(options_frame, textvariable=self.model_name_var, values=SUPPORTED_MODELS, state="readonly", width=28)
+        self.model_dropdown.grid(row=1, column=1, sticky=tk.W, padx=5, pady=2)
+
         # Lengthen Checkbox
         self.lengthen_check = ttk.Checkbutton(options_frame, text="Lengthen Subtitles (Merge short blocks)", variable=self.lengthen_subs_var)
-        self.lengthen_check.grid(row=1, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+        self.lengthen_check.grid(row=2, column=0, columnspan=2, sticky=tk.W, padx=5, pady=2)
+
+        # Downsample Checkbox
+        self.downsample_check = ttk.Checkbutton(options_frame, text="Downsample to 16kHz mono before upload", variable=self.downsample_var)
+        self.downsample_check.grid(row=2, column=2, columnspan=2, sticky=tk.W, padx=5, pady=2)
 
         # Cleanup Options
-        ttk.Label(options_frame, text="Cleanup:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
-        self.del_segments_check = ttk.Checkbutton(options_frame, text="Delete Segment MP3s", variable=self.delete_segments_var)
-        self.del_segments_check.grid(row=3, column=0, sticky=tk.W, padx=5, pady=2)
+        ttk.Label(options_frame, text="Cleanup:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
+        self.del_segments_check = ttk.Checkbutton(options_frame, text="Delete Segment Audio", variable=self.delete_segments_var)
+        self.del_segments_check.grid(row=4, column=0, sticky=tk.W, padx=5, pady=2)
         self.del_temp_audio_check = ttk.Checkbutton(options_frame, text="Delete Downloaded MP3", variable=self.delete_temp_audio_var)
-        self.del_temp_audio_check.grid(row=3, column=1, sticky=tk.W, padx=5, pady=2)
+        self.del_temp_audio_check.grid(row=4, column=1, sticky=tk.W, padx=5, pady=2)
         self.del_segment_srts_check = ttk.Checkbutton(options_frame, text="Delete Segment SRTs", variable=self.delete_segment_srts_var)
-        self.del_segment_srts_check.grid(row=4, column=0, sticky=tk.W, padx=5, pady=2)
+        self.del_segment_srts_check.grid(row=5, column=0, sticky=tk.W, padx=5, pady=2)
 
 
         # --- Controls ---
-        control_frame = ttk.Frame(main_frame, padding="10")
+        control_frame = ttk.Frame(main_frame, style="App.TFrame")
         control_frame.grid(row=3, column=0, columnspan=3, pady=10)
 
         self.start_button = ttk.Button(control_frame, text="Start Processing", command=self.start_processing_thread)
         self.start_button.pack()
 
         # --- Status Area ---
-        status_frame = ttk.LabelFrame(main_frame, text="Status Log", padding="10")
+        status_frame = ttk.LabelFrame(main_frame, text="Status Log", style="App.TLabelframe")
         status_frame.grid(row=4, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         status_frame.columnconfigure(0, weight=1)
         status_frame.rowconfigure(0, weight=1)
         main_frame.rowconfigure(4, weight=1) # Make status area expand vertically
 
-        self.status_text = tk.Text(status_frame, height=10, wrap=tk.WORD, state=tk.DISABLED, borderwidth=1, relief="solid")
+        # Left in the normal state so appends don't have to toggle it; user edits are blocked by bindings instead
+        self.status_text = tk.Text(status_frame, height=10, wrap=tk.WORD, borderwidth=1, relief="solid")
+        self.status_text.bind("<Key>", self._block_status_edit)
+        for sequence in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>", "<Button-2>"):
+            self.status_text.bind(sequence, lambda e: "break")
         self.status_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         scrollbar = ttk.Scrollbar(status_frame, orient=tk.VERTICAL, command=self.status_text.yview)
         scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
         self.status_text['yscrollcommand'] = scrollbar.set
 
-        # Start checking the queue for status updates
-        self.check_status_queue()
+        # Worker threads post <<StatusUpdate>> after queueing a message; drain on delivery
+        self.root.bind("<<StatusUpdate>>", self._drain_queue)
 
     def browse_input_file(self):
-        filepath = filedialog.askopenfilename(
-            title="Select Audio File",
+        filepaths = filedialog.askopenfilenames(
+            title="Select Audio File(s)",
             filetypes=[("Audio Files", "*.mp3 *.wav *.m4a *.ogg"), ("All Files", "*.*")]
         )
-        if filepath:
+        if len(filepaths) == 1:
+            filepath = filepaths[0]
+            self.batch_input_paths = []
             self.input_path_var.set(filepath)
             # Auto-populate output path based on input filename
-            base = os.path.splitext(filepath)[0]
-            self.output_path_var.set(base + ".srt")
+            self.output_path_var.set(str(PurePath(filepath).with_suffix(".srt")))
+        elif filepaths:
+            # Batch: output field holds a folder, one SRT per input is written there
+            self.batch_input_paths = list(filepaths)
+            self.input_path_var.set(BATCH_PATH_SEPARATOR.join(filepaths))
+            self.output_path_var.set(os.path.dirname(filepaths[0]))
 
 
     def browse_output_file(self):
@@ -151,34 +226,92 @@ class AudioProcessorApp:
         if filepath:
             self.output_path_var.set(filepath)
 
+    def _preload_processing_module(self):
+        """Imports audio_processing off the Tk thread; _start_job then finds it already loaded."""
+        def preload():
+            try:
+                import audio_processing # noqa: F401
+            except ImportError:
+                pass # Reported with a dialog when a job is started
+        threading.Thread(target=preload, daemon=True).start()
+
+    def _on_close(self):
+        self._alive = False
+        self.root.destroy()
+
+    def _block_status_edit(self, event):
+        """Keeps the status log read-only while still allowing copy and select-all."""
+        # Only these pass through: the Text class also binds editing keys to Control (Ctrl+D/K/H/O/T/I)
+        if event.state & 0x4 and event.keysym.lower() in STATUS_ALLOWED_CTRL_KEYS: # Control held
+            return None
+        return "break"
+
     def update_status(self, message):
         """Appends a message to the status text box (thread-safe)."""
-        if self.status_text.winfo_exists(): # Check if widget still exists
-            self.status_text.config(state=tk.NORMAL)
+        if self._alive: # Check if widget still exists
             self.status_text.insert(tk.END, message + "\n")
+            # Keep the widget bounded on long jobs
+            line_count = int(self.status_text.index('end-1c').split('.')[0])
+            if line_count > STATUS_MAX_LINES:
+                self.status_text.delete('1.0', f"{STATUS_TRIM_LINES + 1}.0")
             self.status_text.see(tk.END) # Scroll to the end
-            self.status_text.config(state=tk.DISABLED)
 
-    def check_status_queue(self):
-        """Periodically check the queue for messages from the worker thread."""
+    def _drain_queue(self, event=None):
+        """Drains queued messages from the worker thread (runs on the Tk main loop)."""
+        messages = []
         try:
-            while True:
-                message = self.status_queue.get_nowait()
-                self.update_status(message)
+            # Drain in one go so the Text widget is touched once per event, not once per line
+            while len(messages) < STATUS_BATCH_LIMIT:
+                messages.append(self.status_queue.get_nowait())
         except queue.Empty:
             pass
         except Exception as e:
-            print(f"Error in check_status_queue: {e}") # Log errors in the poller
+            print(f"Error in _drain_queue: {e}") # Log errors in the drain handler
         finally:
-            # Schedule the next check if the window is still open
-            if self.root.winfo_exists():
-                 self.root.after(100, self.check_status_queue)
+            if messages:
+                # Worker messages may be StatusMessage records; format only what is rendered
+                from audio_processing import format_status
+                self.update_status("\n".join(map(format_status, messages)))
+            # Batch limit hit: come back for the rest once pending events are handled
+            if not self.status_queue.empty() and self._alive:
+                self.root.after_idle(self._drain_queue)
 
     def queue_status_update(self, message):
-        """Callback function to be passed to the worker thread."""
-        self.status_queue.put(message)
+        """Callback function to be passed to the worker thread (str or StatusMessage)."""
+        try:
+            self.status_queue.put_nowait(message)
+        except queue.Full:
+            # UI is falling behind: drop the oldest line rather than grow without bound
+            try:
+                self.status_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self.status_queue.put_nowait(message)
+            except queue.Full:
+                pass
+        if not self._alive:
+            return
+        try:
+            # Wake the main loop; 'tail' queues the event behind pending ones
+            self.root.event_generate("<<StatusUpdate>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            pass # Window already destroyed or main loop not running
 
     def start_processing_thread(self):
+        # Set before any validation dialog so a second click can't start a duplicate job
+        if self._busy:
+            return
+        self._busy = True
+        started = False
+        try:
+            started = self._start_job()
+        finally:
+            if not started:
+                self._busy = False
+
+    def _start_job(self):
+        """Validates the form and starts the worker thread. Returns True if a job was started."""
         input_path = self.input_path_var.get().strip()
         output_path = self.output_path_var.get().strip()
         selected_language_name = self.language_var.get()
@@ -193,12 +326,40 @@ class AudioProcessorApp:
              messagebox.showerror("Language Missing", "Please select a language.")
              return
 
-        if not output_path.lower().endswith(".srt"):
-             # Automatically add .srt if missing
-             output_path += ".srt"
-             self.output_path_var.set(output_path)
-             messagebox.showwarning("File Extension", f"Output filename automatically set to:\n{output_path}")
+        # Multi-file batch only if the entry still shows the files picked in the dialog
+        is_batch = bool(self.batch_input_paths) and input_path == BATCH_PATH_SEPARATOR.join(self.batch_input_paths)
+        if is_batch:
+            if output_path.lower().endswith(".srt"):
+                output_path = os.path.dirname(output_path)
+            jobs = [(path, os.path.join(output_path, os.path.splitext(os.path.basename(path))[0] + ".srt")) for path in self.batch_input_paths]
+            output_names = [os.path.normcase(job_output) for _, job_output in jobs]
+            if len(set(output_names)) != len(output_names):
+                messagebox.showerror("Duplicate Names", "Several selected files share the same name, so their SRT files would overwrite each other.\nPlease process them separately.")
+                return
+        else:
+            if not output_path.lower().endswith(".srt"):
+                 # Automatically add .srt if missing
+                 output_path += ".srt"
+                 self.output_path_var.set(output_path)
+                 messagebox.showwarning("File Extension", f"Output filename automatically set to:\n{output_path}")
+            jobs = [(input_path, output_path)]
 
+        try:
+            parallel_segments = int(self.parallel_segments_var.get())
+        except (tk.TclError, ValueError):
+            parallel_segments = 0
+        max_parallel = parallel_segments_limit()
+        if not 1 <= parallel_segments <= max_parallel:
+            messagebox.showerror("Invalid Option", f"Parallel Segments must be a number between 1 and {max_parallel}.")
+            return
+
+        # Normally already loaded by _preload_processing_module (then this is a cache lookup)
+        try:
+            # Ensure audio_processing.py is in the same directory or Python path
+            import audio_processing
+        except ImportError as e:
+            messagebox.showerror("Import Error", f"Failed to import required modules: {e}\nMake sure audio_processing.py and srt_utils.py are present.")
+            return
 
         # Get language code from selected name
         language_code = SUPPORTED_LANGUAGES.get(selected_language_name)
@@ -207,6 +368,8 @@ class AudioProcessorApp:
         if language_code == "auto":
              language_code = None # Or potentially "" if None causes issues
 
+        model = self.model_name_var.get()
+
         # Disable button during processing
         self.start_button.config(state=tk.DISABLED)
         self.update_status("-----\nStarting new processing job...")
@@ -216,43 +379,75 @@ class AudioProcessorApp:
         del_segments = self.delete_segments_var.get()
         del_temp_audio = self.delete_temp_audio_var.get()
         del_seg_srts = self.delete_segment_srts_var.get()
-        model = self.model_name_var.get()
+        downsample = self.downsample_var.get()
+        # Pack the checkboxes into one bitmask for the worker
+        flags = sum(bit for var_value, bit in (
+            (lengthen, audio_processing.FLAG_LENGTHEN),
+            (del_segments, audio_processing.FLAG_DEL_SEG),
+            (del_temp_audio, audio_processing.FLAG_DEL_DL),
+            (del_seg_srts, audio_processing.FLAG_DEL_SEGSRT),
+            (downsample, audio_processing.FLAG_DOWNSAMPLE),
+        ) if var_value)
 
         # Clear status area for new job
-        self.status_text.config(state=tk.NORMAL)
         self.status_text.delete('1.0', tk.END)
-        self.status_text.config(state=tk.DISABLED)
-        self.update_status(f"Input: {input_path}")
-        self.update_status(f"Output: {output_path}")
+        if is_batch:
+            self.update_status(f"Input: {len(jobs)} files (up to {BATCH_MAX_WORKERS} at a time)")
+            self.update_status(f"Output folder: {output_path}")
+        else:
+            self.update_status(f"Input: {input_path}")
+            self.update_status(f"Output: {output_path}")
         self.update_status(f"Language: {selected_language_name} ({language_code if language_code else 'Auto'})")
         self.update_status(f"Model: {model}")
-        self.update_status(f"Lengthen: {lengthen}, Cleanup SegMP3: {del_segments}, Cleanup DL: {del_temp_audio}, Cleanup SegSRT: {del_seg_srts}")
+        self.update_status(f"Parallel Segments: {parallel_segments}, Downsample: {downsample}")
+        self.update_status(f"Lengthen: {lengthen}, Cleanup SegAudio: {del_segments}, Cleanup DL: {del_temp_audio}, Cleanup SegSRT: {del_seg_srts}")
         self.update_status("---")
 
 
         # Run processing in a separate thread
         self.processing_thread = threading.Thread(
             target=self.run_processing,
-            args=(input_path, output_path, model, language_code, lengthen, del_segments, del_temp_audio, del_seg_srts),
+            args=(jobs, model, language_code, flags, parallel_segments),
             daemon=True # Allows closing app even if thread is stuck (use with caution)
         )
         self.processing_thread.start()
+        return True
+
+    def run_processing(self, jobs, model, language_code, flags, parallel_segments):
+        """Worker function that runs in the thread. `jobs` is a list of (input_path, output_path)."""
+        # Already imported by start_processing_thread on the main thread
+        from audio_processing import StatusMessage, process_audio_cached
 
-    def run_processing(self, input_path, output_path, model, language_code, lengthen, del_segments, del_temp_audio, del_seg_srts):
-        """Worker function that runs in the thread."""
         start_time = time.time()
+        options = (model, language_code, flags, parallel_segments)
         try:
-            success = process_audio(
-                input_path=input_path,
-                output_srt_filepath=output_path,
-                model_name=model,
-                language=language_code, # Pass the language code
-                status_callback=self.queue_status_update, # Pass the queueing function
-                lengthen_subtitles_flag=lengthen,
-                delete_segments_flag=del_segments,
-                delete_temp_audio_flag=del_temp_audio,
-                delete_segment_srts_flag=del_seg_srts
-            )
+            if len(jobs) == 1:
+                input_path, output_path = jobs[0]
+                success = process_audio_cached(input_path, output_path, *options, self.queue_status_update)
+                success_message = f"Processing complete!\nSRT saved to:\n{output_path}"
+            else:
+                # Each file gets its own process_audio call; prefix its messages so they can be told apart
+                succeeded = 0
+                with concurrent.futures.ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+                    futures = {}
+                    for input_path, output_path in jobs:
+                        name = os.path.basename(input_path)
+                        callback = lambda message, name=name: self.queue_status_update(StatusMessage("info", "[%s] %s", (name, message)))
+                        futures[executor.submit(process_audio_cached, input_path, output_path, *options, callback)] = name
+                    for future in concurrent.futures.as_completed(futures):
+                        name = futures[future]
+                        try:
+                            file_success = future.result()
+                        except Exception as e:
+                            log.error(f"Error processing {name}: {e}", exc_info=e) # Keeps the worker's traceback
+                            self.queue_status_update(StatusMessage("error", "[%s] Error: %s", (name, e)))
+                            file_success = False
+                        succeeded += int(bool(file_success))
+                        self.queue_status_update(f"[{name}] {'Done' if file_success else 'FAILED'} ({succeeded}/{len(jobs)} succeeded so far)")
+                success = succeeded == len(jobs)
+                success_message = f"Processing complete!\n{len(jobs)} SRT files saved to:\n{os.path.dirname(jobs[0][1])}"
+                if not success:
+                    self.queue_status_update(f"{len(jobs) - succeeded} of {len(jobs)} files failed.")
 
             end_time = time.time()
             duration = end_time - start_time
@@ -261,7 +456,7 @@ class AudioProcessorApp:
                 final_message = f"--- PROCESSING FINISHED SUCCESSFULLY (Duration: {duration:.2f}s) ---"
                 self.queue_status_update(final_message)
                 # Schedule messagebox on main thread
-                self.root.after(0, lambda: messagebox.showinfo("Success", f"Processing complete!\nSRT saved to:\n{output_path}\n\nDuration: {duration:.2f} seconds"))
+                self.root.after(0, lambda: messagebox.showinfo("Success", f"{success_message}\n\nDuration: {duration:.2f} seconds"))
             else:
                 final_message = f"--- PROCESSING FAILED (Duration: {duration:.2f}s) ---"
                 self.queue_status_update(final_message)
@@ -274,7 +469,6 @@ class AudioProcessorApp:
             # Catch any unexpected errors in the thread itself
             error_msg = f"Critical Thread Error: {e}"
             print(error_msg) # Log critical error
-            import traceback
             traceback.print_exc()
             self.queue_status_update(error_msg)
             self.queue_status_update(f"--- PROCESSING FAILED CRITICALLY (Duration: {duration:.2f}s) ---")
@@ -282,12 +476,80 @@ class AudioProcessorApp:
             self.root.after(0, lambda: messagebox.showerror("Critical Error", f"An unexpected error occurred:\n{e}"))
 
         finally:
+            self._busy = False
             # Re-enable the button (schedule this action on the main thread)
-             if self.root.winfo_exists():
-                 self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+            if self._alive:
+                self.root.after(0, lambda: self.start_button.config(state=tk.NORMAL))
+
+
+def configure_logging():
+    """
+    Routes log records through a queue to a background listener thread, so worker
+    threads never block on console writes. Level comes from LOG_LEVEL (default INFO).
+    """
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler())
+    # The QueueHandler formats each record before queueing it; plain messages, like the old prints
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s", handlers=[logging.handlers.QueueHandler(log_queue)])
+    listener.start()
+    atexit.register(listener.stop) # Flush anything still queued on exit
+
+
+def run_cli(argv):
+    """Headless mode: transcribe one input from the command line without creating a Tk window."""
+    parser = argparse.ArgumentParser(description="Generate an SRT subtitle file from audio using Groq Whisper.")
+    parser.add_argument("--input", required=True, help="URL or local audio file path")
+    parser.add_argument("--output", help="Output SRT path (default: input path with .srt extension)")
+    parser.add_argument("--language", default=SUPPORTED_LANGUAGES[DEFAULT_LANGUAGE], help="Language code, or 'auto' to auto-detect")
+    parser.add_argument("--model", default=DEFAULT_MODEL, choices=SUPPORTED_MODELS)
+    parser.add_argument("--parallel", type=int, help=f"Segments transcribed at the same time (default: {DEFAULT_PARALLEL_SEGMENTS}, at most GROQ_MAX_PARALLEL_SEGMENTS)")
+    parser.add_argument("--no-lengthen", action="store_true", help="Don't merge short subtitle blocks")
+    parser.add_argument("--no-downsample", action="store_true", help="Upload segments without re-encoding to 16 kHz mono")
+    parser.add_argument("--keep-intermediate", action="store_true", help="Keep segment audio, segment SRTs and downloaded audio")
+    args = parser.parse_args(argv)
+
+    output_path = args.output
+    if not output_path:
+        if args.input.startswith(("http://", "https://")):
+            parser.error("--output is required when --input is a URL")
+        output_path = str(PurePath(args.input).with_suffix(".srt"))
+    output_path = os.path.abspath(output_path) # "talk.srt" has no directory part to create or write segments into
+    max_parallel = parallel_segments_limit()
+    if args.parallel is None:
+        args.parallel = min(DEFAULT_PARALLEL_SEGMENTS, max_parallel)
+    elif not 1 <= args.parallel <= max_parallel:
+        parser.error(f"--parallel must be between 1 and {max_parallel} (GROQ_MAX_PARALLEL_SEGMENTS)")
+    language_code = None if args.language == "auto" else args.language
+
+    import audio_processing
+    flags = 0
+    if not args.no_lengthen:
+        flags |= audio_processing.FLAG_LENGTHEN
+    if not args.no_downsample:
+        flags |= audio_processing.FLAG_DOWNSAMPLE
+    if not args.keep_intermediate:
+        flags |= audio_processing.FLAG_DEL_SEG | audio_processing.FLAG_DEL_DL | audio_processing.FLAG_DEL_SEGSRT
+
+    success = audio_processing.process_audio_cached(
+        args.input, output_path, args.model, language_code, flags, args.parallel,
+        lambda message: print(audio_processing.format_status(message))
+    )
+    return 0 if success else 1
 
 
 if __name__ == "__main__":
+    # audio_processing isn't imported yet, so load .env here for the key check
+    from dotenv import load_dotenv
+    load_dotenv()
+    configure_logging()
+
+    # Any arguments: run headless and skip Tk entirely
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+
+    if tk is None:
+        sys.exit("Error: tkinter is not available in this Python. Install Tk for the GUI, or pass --input to run headless.")
+
     # Check for .env file and API key (optional but good practice)
     if not os.getenv("GROQ_API_KEY"):
          print("Warning: GROQ_API_KEY environment variable not found.")
@@ -1,67 +1,162 @@
 # audio_processing.py
 import subprocess
-import glob
+import threading
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import itertools
+import json
+import logging
+import math
 import os
 import re
+import shutil
 import time
+from pathlib import Path
+from collections import namedtuple, deque
+from types import SimpleNamespace
+import httpx
 from dotenv import load_dotenv
-from groq import Groq
-from srt_utils import parse_srt, merge_subtitles, format_srt # Import from our utils file
+from groq import AsyncGroq
+from rate_limit import TokenBucket
+from srt_utils import parse_srt, parse_srt_iter, format_srt, format_merged_srt, format_timestamp # Import from our utils file
 
-load_dotenv()
+log = logging.getLogger(__name__)
 
-# --- Groq Client Initialization ---
+# verbose_json responses for long segments run to several MB; orjson parses them much faster when installed
 try:
-    client = Groq()
-except Exception as e:
-    print(f"ERROR: Failed to initialize Groq client. Check API key and environment variables. {e}")
-    client = None
-
-# --- Timestamp Formatting ---
-def format_timestamp(seconds: float, always_include_hours: bool = True, decimal_marker: str = ','):
-    """Converts seconds to HH:MM:SS,ms format for SRT."""
-    if seconds is None or not isinstance(seconds, (int, float)):
-        print(f"Warning: Invalid seconds value '{seconds}' received in format_timestamp. Returning 00:00:00,000.")
-        seconds = 0.0
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
-    if seconds < 0:
-        # print(f"Warning: Negative timestamp {seconds} received. Clamping to 0.")
-        seconds = 0.0
+@functools.cache
+def _load_env():
+    """Reads .env into the environment once per process, however often this module is reloaded."""
+    load_dotenv()
+    return True
 
-    milliseconds = round(seconds * 1000.0)
+_load_env() # Before any os.getenv() below
 
-    hours = int(milliseconds // (3600 * 1000))
-    milliseconds -= hours * (3600 * 1000)
+# --- Groq Client Initialization ---
+# Long segments can take minutes to upload and transcribe, but a dead host should fail fast
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+# The SDK retries 429s and transient errors itself (exponential backoff, honouring Retry-After)
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+# Transcription requests started per minute across all jobs in this process (kept just under
+# the 20 Groq's free tier allows for Whisper)
+GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_RPM", "18"))
+# One bucket shared by every segment upload, so concurrent jobs can't add up past the limit
+groq_rate_limiter = TokenBucket(GROQ_REQUESTS_PER_MINUTE)
+
+def _http2_available():
+    """HTTP/2 (multiplexing over a single connection) needs the optional 'h2' package."""
+    try:
+        import h2 # noqa: F401
+        return True
+    except ImportError:
+        return False
 
-    minutes = int(milliseconds // (60 * 1000))
-    milliseconds -= minutes * (60 * 1000)
+def _create_async_http_client(max_connections):
+    """
+    One keep-alive connection pool shared by every segment upload, so parallel and
+    consecutive transcriptions reuse TCP/TLS connections instead of handshaking each time.
+    Uses the SDK's aiohttp backend (better at many simultaneous requests) when
+    groq[aiohttp] is installed, else httpx. Either way the pool holds max_connections.
+    """
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    try:
+        from groq import DefaultAioHttpClient
+        return DefaultAioHttpClient(limits=limits, timeout=HTTP_TIMEOUT)
+    except (ImportError, RuntimeError): # RuntimeError: the SDK has the class but aiohttp is missing
+        return httpx.AsyncClient(http2=_http2_available(), limits=limits, timeout=HTTP_TIMEOUT)
 
-    seconds_part = int(milliseconds // 1000)
-    milliseconds -= seconds_part * 1000
+# Connections in the shared pool; enough for a few batch jobs uploading at once
+GROQ_POOL_CONNECTIONS = 16
 
-    # Use f-string formatting for leading zeros
-    hours_str = f"{hours:02d}"
-    minutes_str = f"{minutes:02d}"
-    seconds_str = f"{seconds_part:02d}"
-    milliseconds_str = f"{int(milliseconds):03d}"
+_groq_loop = None
+_groq_client = None
+_groq_client_lock = threading.Lock()
 
-    # Force hours component for SRT standard
-    time_str = f"{hours_str}:{minutes_str}:{seconds_str}{decimal_marker}{milliseconds_str}"
-    return time_str
+def _get_groq_client():
+    """
+    Returns (loop, client): the process-wide event loop, running on a daemon thread, and
+    the one AsyncGroq client bound to it. Both are created on first use, so every job
+    (including concurrent batch jobs) shares a single connection pool. Raises if the
+    client can't be initialized (e.g. no API key).
+    """
+    global _groq_loop, _groq_client
+    with _groq_client_lock:
+        if _groq_client is None:
+            client = AsyncGroq(http_client=_create_async_http_client(GROQ_POOL_CONNECTIONS), max_retries=GROQ_MAX_RETRIES)
+            if _groq_loop is None:
+                _groq_loop = asyncio.new_event_loop()
+                threading.Thread(target=_groq_loop.run_forever, name="groq-uploads", daemon=True).start()
+            _groq_client = client
+        return _groq_loop, _groq_client
+
+# Default number of segments sent to Groq at the same time
+DEFAULT_MAX_PARALLEL_SEGMENTS = 4
+# Hard ceiling on concurrent segment uploads, to stay within the Groq key's rate limits
+MAX_PARALLEL_SEGMENTS_CAP = int(os.getenv("GROQ_MAX_PARALLEL_SEGMENTS", "8"))
+
+# Whisper works on 16 kHz mono input, so anything above that is wasted upload bandwidth.
+# Opus at 32 kbps is a fraction of a typical 128+ kbps stereo MP3.
+# Segments must come out byte-identical on every run, or the content-hashed segment cache never
+# hits: without bitexact the Ogg muxer picks a random stream serial and encoders stamp their version.
+SEGMENT_BITEXACT_ARGS = ["-fflags", "+bitexact", "-flags:a", "+bitexact"]
+DOWNSAMPLE_FFMPEG_ARGS = ["-ac", "1", "-ar", "16000", "-c:a", "libopus", "-b:a", "32k", *SEGMENT_BITEXACT_ARGS]
+DOWNSAMPLE_SEGMENT_EXT = ".ogg"
+
+# Length of each audio segment sent for transcription
+SEGMENT_SECONDS = 600
+# Segments smaller than this (~2 s of 32 kbps Opus, under 1 s of typical MP3) aren't worth uploading
+MIN_SEGMENT_BYTES = 8 * 1024
+
+# Inputs below this size (Groq's upload limit is 25 MB) can be sent as-is, without segmenting,
+# when no downsampling is requested
+DIRECT_UPLOAD_MAX_BYTES = 24 * 1024 * 1024
+
+# Content types sent with uploaded segments, by file extension
+AUDIO_MIME_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".ogg": "audio/ogg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+    ".m4a": "audio/mp4",
+}
+
+# --- Processing Option Flags (bitmask passed to process_audio) ---
+FLAG_LENGTHEN = 1     # Merge short subtitle blocks
+FLAG_DEL_SEG = 2      # Delete segment audio files
+FLAG_DEL_DL = 4       # Delete downloaded audio file
+FLAG_DEL_SEGSRT = 8   # Delete per-segment SRT files
+FLAG_DOWNSAMPLE = 16  # Re-encode segments to 16 kHz mono Opus before upload
+# Flags that change the transcript itself (the rest only affect cleanup)
+TRANSCRIPT_FLAGS = FLAG_LENGTHEN | FLAG_DOWNSAMPLE
+
+# --- Status Messages ---
+# High-frequency progress is reported as a record and only formatted when it is displayed,
+# so lines that are dropped or trimmed by the GUI never pay for string formatting.
+StatusMessage = namedtuple("StatusMessage", "level fmt args")
+
+def format_status(message):
+    """Renders a status_callback message (plain str or StatusMessage) as text."""
+    if isinstance(message, str):
+        return message
+    args = tuple(format_status(arg) if isinstance(arg, StatusMessage) else arg for arg in message.args)
+    return message.fmt % args
 
 # --- SRT Time to Milliseconds ---
 def _srt_time_to_ms(time_str):
     """Converts HH:MM:SS,ms SRT time string to milliseconds."""
     try:
-        parts = time_str.split(':')
-        h = int(parts[0])
-        m = int(parts[1])
-        s_ms = parts[2].split(',')
-        s = int(s_ms[0])
-        ms = int(s_ms[1])
-        return h * 3600000 + m * 60000 + s * 1000 + ms
+        h, m, s_ms = time_str.split(':')
+        s, ms = s_ms.split(',')
+        return int(h) * 3600000 + int(m) * 60000 + int(s) * 1000 + int(ms)
     except Exception as e:
-        print(f"Warning: Could not parse time string '{time_str}': {e}. Returning 0.")
+        log.warning(f"Warning: Could not parse time string '{time_str}': {e}. Returning 0.")
         return 0
 
 # --- Milliseconds to SRT Time ---
@@ -75,255 +170,573 @@ def _ms_to_srt_time(total_ms):
     # Ensure conversion back to int before formatting
     return f"{int(h):02d}:{int(m):02d}:{int(s):02d},{int(ms):03d}"
 
-# --- Audio Transcription Segment ---
-def process_audio_segment(audio_filepath, output_dir, model_name="whisper-large-v3", language="ja"):
+# --- Transcript Cache ---
+TRANSCRIPT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "groq-whisper")
+
+def _hash_file(filepath, digest=hashlib.sha256, chunk_size=4 * 1024 * 1024):
+    """Returns the hex digest of a file (SHA-256 unless another hashlib constructor is given)."""
+    with open(filepath, "rb") as f:
+        if hasattr(hashlib, "file_digest"): # Python 3.11+: hashing loop runs in C
+            return hashlib.file_digest(f, digest).hexdigest()
+        file_hash = digest()
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+def get_transcript_cache_path(input_path, model_name, language, flags):
     """
-    Transcribes an audio segment using Groq (requesting verbose_json),
-    parses timestamps, formats to SRT, and returns the path to the generated SRT file.
+    Returns the cache path for a local audio file transcribed with the given settings,
+    or None if caching is disabled (GROQ_WHISPER_NO_CACHE=1) or doesn't apply (e.g. URLs).
     """
-    if not client:
-         print("ERROR: Groq client not initialized. Cannot transcribe.")
-         return None
+    if os.getenv("GROQ_WHISPER_NO_CACHE") == "1" or not os.path.isfile(input_path):
+        return None
+    try:
+        audio_hash = _hash_file(input_path)
+    except OSError as e:
+        log.warning(f"Warning: Could not hash '{input_path}' for transcript cache: {e}")
+        return None
+    # Lengthening and downsampling change the final SRT, so they are part of the key alongside model/language
+    options_hash = hashlib.sha256(f"{model_name}|{language or 'auto'}|{flags & TRANSCRIPT_FLAGS}".encode("utf-8")).hexdigest()
+    cache_key = hashlib.sha256(f"{audio_hash}|{options_hash}".encode("utf-8")).hexdigest()
+    return os.path.join(TRANSCRIPT_CACHE_DIR, f"{cache_key}.srt")
 
-    srt_base_filename = os.path.splitext(os.path.basename(audio_filepath))[0]
-    srt_filename = f"{srt_base_filename}.srt"
-    srt_path = os.path.join(output_dir, srt_filename)
+def load_cached_transcript(cache_path, output_srt_filepath):
+    """
+    Copies a cached SRT to the output path. Returns True on a cache hit.
+    Any problem with the cache entry (missing, empty, unparsable) is treated as a miss.
+    """
+    if not cache_path or not os.path.exists(cache_path):
+        return False
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            if not parse_srt(f.read()):
+                log.warning(f"Warning: Ignoring corrupt transcript cache entry: {cache_path}")
+                return False
+        output_dir = os.path.dirname(output_srt_filepath)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        shutil.copyfile(cache_path, output_srt_filepath)
+        return True
+    except (OSError, UnicodeDecodeError) as e:
+        log.warning(f"Warning: Could not use transcript cache entry {cache_path}: {e}")
+        return False
 
+def store_cached_transcript(cache_path, output_srt_filepath):
+    """Saves a finished SRT into the transcript cache (best effort)."""
+    if not cache_path:
+        return
+    temp_cache_path = cache_path + ".tmp"
     try:
-        with open(audio_filepath, "rb") as audio_file:
-            files = {"file": (os.path.basename(audio_filepath), audio_file, "audio/mpeg")}
-            print(f"Requesting transcription for {audio_filepath} (lang: {language}, format: verbose_json)")
-            # Request verbose_json to get timestamps
-            transcript_response = client.audio.transcriptions.create(
-                model=model_name,
-                file=files["file"],
-                language=language,
-                response_format="verbose_json" # Request JSON with timestamps
-            )
-        print(f"Received transcription response for {audio_filepath}")
-
-        # --- SRT Formatting Logic ---
-        srt_content_parts = []
-        # Adjust based on actual Groq response structure if necessary
-        segments = getattr(transcript_response, 'segments', None)
-
-        if segments is None or not isinstance(segments, list):
-             print(f"Error: Could not generate SRT for {audio_filepath}. 'segments' field missing, empty, or not a list in response.")
-             # Optional: Try to get plain text if available
-             plain_text = getattr(transcript_response, 'text', None)
-             if plain_text:
-                 print(f"Warning: Saving plain text only for {audio_filepath} as no timestamp segments were found.")
-                 txt_filename = f"{srt_base_filename}.txt"
-                 txt_path = os.path.join(output_dir, txt_filename)
-                 try:
-                     with open(txt_path, "w", encoding="utf-8") as txt_file:
-                         txt_file.write(plain_text)
-                 except Exception as write_err:
-                     print(f"Error writing plain text file {txt_path}: {write_err}")
-             return None # Indicate failure to create SRT
-
-        print(f"Found {len(segments)} segments for {audio_filepath}. Formatting SRT...")
-        srt_index = 1
-        for segment in segments:
-            try:
-                # Access segment attributes - adjust names if Groq uses different ones
-                # Ensure they are numbers before formatting
-                start_time_sec = float(segment['start']) # Use ['key'] access
-                end_time_sec = float(segment['end'])   # Use ['key'] access
-                text = str(segment['text']).strip()  # Use ['key'] access
-
-                # Basic validation
-                if start_time_sec >= end_time_sec:
-                    print(f"Warning: Skipping segment {srt_index} in {audio_filepath} due to invalid time (start >= end): {start_time_sec} >= {end_time_sec}")
-                    continue
-                if not text:
-                    # print(f"Note: Skipping segment {srt_index} in {audio_filepath} due to empty text.")
-                    continue # Skip segments with no text
-
-                start_srt = format_timestamp(start_time_sec)
-                end_srt = format_timestamp(end_time_sec)
-
-                srt_content_parts.append(f"{srt_index}\n")
-                srt_content_parts.append(f"{start_srt} --> {end_srt}\n")
-                srt_content_parts.append(f"{text}\n\n") # Add the required blank line
-                srt_index += 1
-
-            except (KeyError, ValueError, TypeError) as e: # Catch KeyError primarily
-                print(f"Error processing segment data in {audio_filepath}: {e}. Check response structure/keys/types.")
-                print(f"Problematic segment data: {segment}")
-                continue # Skip this problematic segment
-            except Exception as e: # Catch-all for unexpected errors
-                print(f"Unexpected error processing segment {srt_index} in {audio_filepath}: {e}")
-                print(f"Problematic segment data: {segment}")
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        shutil.copyfile(output_srt_filepath, temp_cache_path)
+        os.replace(temp_cache_path, cache_path) # Never leave a half-written entry behind
+    except OSError as e:
+        log.warning(f"Warning: Could not write transcript cache entry {cache_path}: {e}")
+
+# --- Segment Response Cache ---
+# Raw verbose_json responses are kept per segment, so re-running (or resuming) a job only
+# uploads segments whose audio hasn't been transcribed with the same model/language before.
+SEGMENT_CACHE_DIRNAME = "_transcription_cache"
+SEGMENT_CACHE_TTL_SECONDS = int(os.getenv("GROQ_WHISPER_SEGMENT_CACHE_TTL", str(30 * 24 * 3600)))
+
+@functools.lru_cache(maxsize=256)
+def _segment_audio_hash(audio_filepath, file_size, mtime_ns):
+    """BLAKE2b digest of a segment file; size/mtime are part of the key so edits invalidate it."""
+    return _hash_file(audio_filepath, digest=lambda: hashlib.blake2b(digest_size=16))
+
+def _segment_cache_path(audio_filepath, output_dir, model_name, language):
+    """Returns the cache file path for a segment's response, or None if caching is disabled."""
+    if os.getenv("GROQ_WHISPER_NO_CACHE") == "1":
+        return None
+    try:
+        stat = os.stat(audio_filepath)
+        audio_hash = _segment_audio_hash(audio_filepath, stat.st_size, stat.st_mtime_ns)
+    except OSError as e:
+        log.warning(f"Warning: Could not hash segment '{audio_filepath}' for cache: {e}")
+        return None
+    cache_key = f"{audio_hash}_{model_name}_{language or 'auto'}"
+    return os.path.join(output_dir, SEGMENT_CACHE_DIRNAME, f"{cache_key}.json")
+
+def _load_cached_response(cache_path):
+    """Returns a cached transcription response (attribute access like the SDK object), or None."""
+    if not cache_path or not os.path.exists(cache_path):
+        return None
+    try:
+        if time.time() - os.path.getmtime(cache_path) > SEGMENT_CACHE_TTL_SECONDS:
+            return None # Expired
+        with open(cache_path, "rb") as f:
+            return SimpleNamespace(**_json_loads(f.read()))
+    except (OSError, ValueError, TypeError) as e:
+        log.warning(f"Warning: Ignoring unreadable segment cache entry {cache_path}: {e}")
+        return None
+
+def _store_cached_response(cache_path, response_bytes):
+    """Saves a raw verbose_json response body to the segment cache (best effort)."""
+    if not cache_path:
+        return
+    temp_cache_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(temp_cache_path, "wb") as f:
+            f.write(response_bytes)
+        os.replace(temp_cache_path, cache_path)
+    except OSError as e:
+        log.warning(f"Warning: Could not write segment cache entry {cache_path}: {e}")
+
+def _parse_transcription_response(response_bytes):
+    """Parses a raw verbose_json body into an object with the SDK response's attributes."""
+    return SimpleNamespace(**_json_loads(response_bytes))
+
+# --- Audio Transcription Segment ---
+def _segment_srt_path(audio_filepath, output_dir):
+    """Path of the SRT generated for an audio segment (same base name, .srt extension)."""
+    srt_base_filename = os.path.splitext(os.path.basename(audio_filepath))[0]
+    return os.path.join(output_dir, f"{srt_base_filename}.srt")
+
+def _segment_upload_file(audio_filepath, audio_file):
+    """
+    (filename, file object, content type) tuple for the Groq upload.
+    The open file object is handed through as-is so httpx streams the multipart body
+    from disk; don't read() it into bytes first.
+    """
+    mime_type = AUDIO_MIME_TYPES.get(os.path.splitext(audio_filepath)[1].lower(), "audio/mpeg")
+    return (os.path.basename(audio_filepath), audio_file, mime_type)
+
+def _write_segment_srt(transcript_response, audio_filepath, srt_path):
+    """
+    Formats the segments of a verbose_json transcription response as SRT and writes it
+    to srt_path. Returns (srt_path, entries), where entries are the written blocks as
+    (start_ms, end_ms, text) tuples, or (None, None) if no SRT could be produced.
+    """
+    srt_content_parts = []
+    entries = [] # Same blocks, kept in memory so combining doesn't have to re-read and re-parse the file
+    # Adjust based on actual Groq response structure if necessary
+    segments = getattr(transcript_response, 'segments', None)
+
+    if segments is None or not isinstance(segments, list):
+         log.error(f"Error: Could not generate SRT for {audio_filepath}. 'segments' field missing, empty, or not a list in response.")
+         # Optional: Try to get plain text if available
+         plain_text = getattr(transcript_response, 'text', None)
+         if plain_text:
+             log.warning(f"Warning: Saving plain text only for {audio_filepath} as no timestamp segments were found.")
+             txt_path = os.path.splitext(srt_path)[0] + ".txt"
+             try:
+                 with open(txt_path, "w", encoding="utf-8") as txt_file:
+                     txt_file.write(plain_text)
+             except Exception as write_err:
+                 log.error(f"Error writing plain text file {txt_path}: {write_err}")
+         return None, None # Indicate failure to create SRT
+
+    log.info(f"Found {len(segments)} segments for {audio_filepath}. Formatting SRT...")
+    srt_index = 1
+    for segment in segments:
+        try:
+            # Access segment attributes - adjust names if Groq uses different ones
+            # Ensure they are numbers before formatting
+            start_time_sec = float(segment['start']) # Use ['key'] access
+            end_time_sec = float(segment['end'])   # Use ['key'] access
+            text = str(segment['text']).strip()  # Use ['key'] access
+
+            # Basic validation
+            if start_time_sec >= end_time_sec:
+                log.warning(f"Warning: Skipping segment {srt_index} in {audio_filepath} due to invalid time (start >= end): {start_time_sec} >= {end_time_sec}")
                 continue
+            if not text:
+                # log.debug(f"Note: Skipping segment {srt_index} in {audio_filepath} due to empty text.")
+                continue # Skip segments with no text
+
+            start_srt = format_timestamp(start_time_sec)
+            end_srt = format_timestamp(end_time_sec)
+            # Same rounding/clamping as format_timestamp, so these match what the file holds
+            entries.append((round(max(start_time_sec, 0.0) * 1000.0), round(max(end_time_sec, 0.0) * 1000.0), text))
+
+            srt_content_parts.append(f"{srt_index}\n{start_srt} --> {end_srt}\n{text}\n\n") # One string per block, ending in the required blank line
+            srt_index += 1
+
+        except (KeyError, ValueError, TypeError) as e: # Catch KeyError primarily
+            log.error(f"Error processing segment data in {audio_filepath}: {e}. Check response structure/keys/types.")
+            log.error(f"Problematic segment data: {segment}")
+            continue # Skip this problematic segment
+        except Exception as e: # Catch-all for unexpected errors
+            log.error(f"Unexpected error processing segment {srt_index} in {audio_filepath}: {e}")
+            log.error(f"Problematic segment data: {segment}")
+            continue
 
 
-        # Join the parts into the final SRT string
-        srt_content = "".join(srt_content_parts).strip()
+    # Join the parts into the final SRT string
+    srt_content = "".join(srt_content_parts).strip()
 
-        if not srt_content:
-             print(f"Error: No valid SRT content generated for {audio_filepath} after processing segments.")
-             return None
+    if not srt_content:
+         log.error(f"Error: No valid SRT content generated for {audio_filepath} after processing segments.")
+         return None, None
 
-        # Write the manually formatted SRT content
-        with open(srt_path, "w", encoding="utf-8") as srt_file:
-            srt_file.write(srt_content + '\n') # Ensure trailing newline
+    # Write the manually formatted SRT content
+    with open(srt_path, "w", encoding="utf-8") as srt_file:
+        srt_file.write(srt_content + '\n') # Ensure trailing newline
+
+    log.info(f"Successfully generated SRT: {srt_path}")
+    return srt_path, entries
+
+async def process_audio_segment_async(async_client, audio_filepath, output_dir, model_name="whisper-large-v3-turbo", language="ja", srt_path=None, rate_limiter=None):
+    """
+    Transcribes an audio segment with an AsyncGroq client (requesting verbose_json),
+    formats it to SRT at srt_path (by default named after the segment in output_dir) and
+    returns (srt_path, entries) like _write_segment_srt. If rate_limiter
+    (a rate_limit.TokenBucket) is given, each API request waits for it first.
+    """
+    srt_path = srt_path or _segment_srt_path(audio_filepath, output_dir)
 
-        print(f"Successfully generated SRT: {srt_path}")
-        return srt_path
+    try:
+        # Hashing reads the whole segment, so keep it off the event loop
+        cache_path = await asyncio.to_thread(_segment_cache_path, audio_filepath, output_dir, model_name, language)
+        cached_response = _load_cached_response(cache_path)
+        if cached_response is not None:
+            log.info(f"Using cached transcription for {audio_filepath}")
+            return _write_segment_srt(cached_response, audio_filepath, srt_path)
+
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async() # Cache hits above never count against the quota
+        with open(audio_filepath, "rb") as audio_file:
+            log.info(f"Requesting transcription for {audio_filepath} (lang: {language}, format: verbose_json)")
+            raw_response = await async_client.audio.transcriptions.with_raw_response.create(
+                model=model_name,
+                file=_segment_upload_file(audio_filepath, audio_file),
+                language=language,
+                response_format="verbose_json" # Request JSON with timestamps
+            )
+            response_body = await raw_response.read() # The raw response has no .content; read() returns the body bytes
+        log.info(f"Received transcription response for {audio_filepath}")
+        _store_cached_response(cache_path, response_body)
+        return _write_segment_srt(_parse_transcription_response(response_body), audio_filepath, srt_path)
 
     except Exception as e:
         # Catch Groq API errors or other issues
-        print(f"Error during transcription or SRT formatting for {audio_filepath}: {e}")
-        # Print traceback for detailed debugging of unexpected errors
-        # import traceback
-        # traceback.print_exc()
-        return None
+        log.error(f"Error during transcription or SRT formatting for {audio_filepath}: {e}")
+        return None, None
+
+# Groq's Batch API (half price, up to 24h turnaround) isn't used here: batched audio
+# transcription requests take a public audio URL, and the Files API only accepts JSONL,
+# so locally cut segments have no way in without a separate public host.
+async def transcribe_segments_async(async_client, segment_files, output_dir, model_name, language, max_parallel_segments, on_segment_done, cut_segment=None, srt_paths=None):
+    """
+    Transcribes all segments concurrently with async_client, at most max_parallel_segments
+    uploads in flight at a time. Calls on_segment_done(index, srt_path_or_None) as each
+    one finishes and returns (srt_path, entries) pairs in segment order (see
+    process_audio_segment_async; (None, None) for failures and for near-empty segments,
+    which are never uploaded).
+
+    If cut_segment(index, segment_path) is given, the segment files don't exist yet: each
+    one is cut first (a few at a time, in worker threads) and uploaded as soon as it is
+    ready, so transcription overlaps with segmentation. Cut errors propagate, after the
+    remaining segments have been cancelled.
+    srt_paths optionally overrides where each segment's SRT is written.
+    """
+    semaphore = asyncio.Semaphore(max_parallel_segments)
+    cut_semaphore = asyncio.Semaphore(os.cpu_count() or 4)
+
+    async def transcribe_one(index, audio_filepath):
+        if cut_segment is not None:
+            async with cut_semaphore:
+                await asyncio.to_thread(cut_segment, index, audio_filepath)
+            log.info(f"Cut segment {os.path.basename(audio_filepath)}")
+        # A near-empty trailing chunk would still cost a full Groq call, so leave it out
+        if os.path.getsize(audio_filepath) < MIN_SEGMENT_BYTES:
+            srt_path, entries = None, None
+        else:
+            async with semaphore:
+                srt_path, entries = await process_audio_segment_async(
+                    async_client, audio_filepath, output_dir, model_name, language,
+                    srt_path=srt_paths[index] if srt_paths else None, rate_limiter=groq_rate_limiter,
+                )
+        on_segment_done(index, srt_path)
+        return srt_path, entries
+
+    tasks = [asyncio.create_task(transcribe_one(i, f)) for i, f in enumerate(segment_files)]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        # gather doesn't stop the siblings of a failed task, and the loop is shared, so
+        # cancel them and let them unwind before re-raising
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+# --- External Commands ---
+def _run_streaming(command, on_line, tail_lines=200):
+    """
+    Runs an argv-list command (no shell), passing each non-empty output line (stdout and
+    stderr merged) to on_line as it is produced. Only the last tail_lines lines are kept,
+    for error reporting. Raises CalledProcessError (output = kept lines) on a non-zero exit.
+    """
+    tail = deque(maxlen=tail_lines)
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding='utf-8', errors='replace', bufsize=1) as process:
+        for line in process.stdout:
+            line = line.strip()
+            if line:
+                tail.append(line)
+                on_line(line)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output="\n".join(tail))
+
+AudioInfo = namedtuple("AudioInfo", "duration codec")
+
+def _probe_audio(audio_filepath):
+    """
+    Returns an AudioInfo(duration, codec) for the first audio stream via one ffprobe call.
+    duration is in seconds; either field is None if it can't be read.
+    """
+    command = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "format=duration:stream=codec_name", "-of", "json", audio_filepath,
+    ]
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        probe = json.loads(result.stdout)
+    except (subprocess.CalledProcessError, FileNotFoundError, ValueError) as e:
+        log.warning(f"Could not probe {audio_filepath}: {e}")
+        return AudioInfo(None, None)
+    streams = probe.get("streams") or [{}]
+    try:
+        duration = float(probe.get("format", {}).get("duration"))
+    except (TypeError, ValueError):
+        duration = None
+    return AudioInfo(duration, streams[0].get("codec_name"))
+
+def _cut_segment(audio_filepath, index, segment_path, codec_args, segment_count=None):
+    """
+    Cuts chunk number index (SEGMENT_SECONDS long) out of audio_filepath into segment_path
+    with a seeking ffmpeg run. Many of these can run at once; they all read the same
+    input through the OS page cache. The last of segment_count chunks runs to the end of
+    the input, so audio past an underestimated duration isn't dropped. Raises like
+    _run_streaming on failure, and RuntimeError if ffmpeg exits cleanly without writing
+    segment_path.
+    """
+    is_last = segment_count is not None and index >= segment_count - 1
+    command = [
+        "ffmpeg",
+        "-hide_banner", "-loglevel", "error", "-nostdin",
+        "-ss", str(index * SEGMENT_SECONDS), # Input seek: jumps straight to the chunk
+        *([] if is_last else ["-t", str(SEGMENT_SECONDS)]),
+        "-i", audio_filepath,
+        *codec_args,
+        "-y", segment_path,
+    ]
+    _run_streaming(command, lambda line: log.info(f"FFmpeg [{index:03d}]: {line}"))
+    if not os.path.exists(segment_path):
+        raise RuntimeError(f"FFmpeg wrote no output for segment {index:03d} ({os.path.basename(segment_path)})")
 
 # --- Download Audio ---
+YTDLP_CONCURRENT_FRAGMENTS = int(os.getenv("YTDLP_CONCURRENT_FRAGMENTS", "8"))
+
 def download_audio_from_url(url, output_path, status_callback):
-    """Downloads audio from a YouTube URL using yt-dlp."""
+    """Downloads audio from a YouTube URL using yt-dlp, reporting its progress lines."""
     if not url:
         status_callback("Error: Please enter a URL.")
         return None
 
     status_callback(f"Downloading audio from: {url}...")
     # Ensure yt-dlp is in PATH or provide full path if needed
-    # Use --no-warnings potentially
-    command = f"yt-dlp --no-warnings --extract-audio --audio-format mp3 -o \"{output_path}\" \"{url}\""
+    # --newline makes yt-dlp print each progress update on its own line
+    command = [
+        "yt-dlp", "--no-warnings", "--newline", "--progress", "--extract-audio", "--audio-format", "mp3",
+        "--concurrent-fragments", str(YTDLP_CONCURRENT_FRAGMENTS), # HLS/DASH fragments download in parallel
+    ]
+    if shutil.which("aria2c"): # Multi-connection downloads when aria2 is installed
+        command += ["--downloader", "aria2c", "--downloader-args", "aria2c:-x 16 -s 16"]
+    command += ["-o", output_path, url]
     try:
-        # Use capture_output=True to get stderr/stdout
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True, encoding='utf-8')
+        _run_streaming(command, status_callback)
         status_callback(f"Successfully downloaded audio to: {output_path}")
         return output_path
     except subprocess.CalledProcessError as e:
-        error_message = f"Error downloading audio: {e.stderr or e.stdout or 'Unknown yt-dlp error'}"
+        error_message = f"Error downloading audio: {e.output or 'Unknown yt-dlp error'}"
         status_callback(error_message)
-        print(error_message) # Also print for debugging
+        log.error(error_message) # Also log for debugging
         return None
     except FileNotFoundError:
         status_callback("Error: 'yt-dlp' command not found. Make sure it's installed and in your system's PATH.")
-        print("Error: 'yt-dlp' command not found.")
+        log.error("Error: 'yt-dlp' command not found.")
         return None
     except Exception as e:
         status_callback(f"Unexpected error during download: {e}")
-        print(f"Unexpected download error: {e}")
+        log.error(f"Unexpected download error: {e}")
         return None
 
 
 # --- Combine SRT Files (Moved here to handle timestamp adjustments) ---
-def combine_srt_files(srt_files, output_dir, output_filepath):
+def _read_text_file(filepath):
+    with open(filepath, 'r', encoding='utf-8') as infile:
+        return infile.read()
+
+# Combined SRT output: large stdio buffer, and formatted entries are flushed in batches
+COMBINE_WRITE_BUFFER_SIZE = 1 << 20
+COMBINE_FLUSH_ENTRIES = 1000
+# Segment SRTs read ahead of the one being combined (bounds how much file text is held at once)
+COMBINE_READ_AHEAD = 2
+# Segment number in names like _segment_001.srt or _min01.srt
+_SEGMENT_NUM_RE = re.compile(r'(?:segment_|segment|_min)(\d+)\.srt$', re.IGNORECASE)
+
+def combine_srt_files(srt_files, output_dir, output_filepath, return_entries=False, presorted=False, segment_entries=None):
     """
     Combines a list of SRT files generated from segments (with reset timestamps)
     into a single SRT file, adjusting timestamps.
+    With return_entries=True nothing is written; the combined entry dicts are returned instead.
+    Pass presorted=True when srt_files is already in segment order to skip the filename sort.
+    segment_entries optionally gives, per file, its blocks as (start_ms, end_ms, text)
+    tuples (as returned by _write_segment_srt); those files are not read. None: read the file.
     """
     if not srt_files:
-        print("No SRT files to combine.")
+        log.info("No SRT files to combine.")
         return None
+    entries_by_file = dict(zip(srt_files, segment_entries)) if segment_entries else {}
 
     # Sort based on segment number in filename (more robust)
     def get_segment_number(filename):
         basename = os.path.basename(filename)
         # Try to match patterns like _segment_001.srt or _min01.srt etc.
         # Match numbers preceded by "segment_" or "_min" or just "segment"
-        match = re.search(r'(?:segment_|segment|_min)(\d+)\.srt$', basename, re.IGNORECASE)
+        match = _SEGMENT_NUM_RE.search(basename)
         if match:
             try:
                 return int(match.group(1))
             except (ValueError, IndexError):
                 return float('inf') # Put unparsable ones at the end
-        print(f"Warning: Could not extract segment number from '{basename}'. Assigning high sort order.")
+        log.warning(f"Warning: Could not extract segment number from '{basename}'. Assigning high sort order.")
         return float('inf') # Put files without clear numbers at the end
 
     try:
-        srt_files.sort(key=get_segment_number)
-        print("Sorted SRT files for combination:", [os.path.basename(f) for f in srt_files])
+        if not presorted:
+            srt_files.sort(key=get_segment_number) # key= is evaluated once per file (decorate-sort-undecorate), not per comparison
+        log.info("SRT files in combination order: %s", [os.path.basename(f) for f in srt_files])
     except Exception as e:
-         print(f"Warning: Could not sort SRT files reliably based on name: {e}. Combining in detected order.")
+         log.warning(f"Warning: Could not sort SRT files reliably based on name: {e}. Combining in detected order.")
 
     try:
-        with open(output_filepath, 'w', encoding='utf-8') as outfile:
-            overall_subtitle_index = 1
-            time_offset_ms = 0
-            last_segment_end_time_ms = 0
-
-            for srt_filepath in srt_files:
-                if not srt_filepath or not os.path.exists(srt_filepath):
-                    print(f"Warning: Skipping missing SRT file: {srt_filepath}")
-                    continue
-
-                print(f"Combining: {os.path.basename(srt_filepath)}")
-                try:
-                    with open(srt_filepath, 'r', encoding='utf-8') as infile:
-                        srt_content = infile.read()
-                        # Use the parser from srt_utils
-                        entries = parse_srt(srt_content)
-
-                        if not entries:
-                            print(f"Warning: No entries parsed from {srt_filepath}, skipping.")
-                            continue
-
-                        # Check if timestamps reset (first entry starts near 0)
-                        # Important: Use the helper to convert SRT time string to ms
-                        first_entry_start_ms = _srt_time_to_ms(entries[0]['start'])
-
-                        # If the first subtitle starts very early, assume segment reset timestamps
-                        # Add the end time of the *previous* segment as the offset.
-                        if first_entry_start_ms < 1000: # If first sub is within 1 sec of 00:00:00
-                           time_offset_ms = last_segment_end_time_ms
-                           print(f"  Segment reset detected. Applying offset: {time_offset_ms}ms")
-                        else:
-                            # If timestamps seem continuous, don't add offset from previous segment
-                            # (This might happen if ffmpeg -reset_timestamps wasn't used or failed)
-                            time_offset_ms = 0
-                            print(f"  Timestamps appear continuous (first start: {first_entry_start_ms}ms). No offset applied.")
-
-
-                        segment_max_end_time_current_segment = 0
-                        for entry in entries:
-                             # Convert entry's SRT times to ms, add offset, convert back
-                             current_start_ms = _srt_time_to_ms(entry['start'])
-                             current_end_ms = _srt_time_to_ms(entry['end'])
-
-                             new_start_ms = current_start_ms + time_offset_ms
-                             new_end_ms = current_end_ms + time_offset_ms
-
-                             # Basic check for validity
-                             if new_start_ms >= new_end_ms:
-                                 print(f"  Warning: Skipping entry {entry.get('index','?')} due to invalid time after offset: {new_start_ms} >= {new_end_ms}")
-                                 continue
-
-                             outfile.write(str(overall_subtitle_index) + '\n')
-                             outfile.write(f"{_ms_to_srt_time(new_start_ms)} --> {_ms_to_srt_time(new_end_ms)}\n")
-                             outfile.write(entry['text'].strip() + '\n\n') # Ensure text is stripped and add blank line
-                             overall_subtitle_index += 1
-
-                             # Track the maximum end time *within this segment* after applying offset
-                             segment_max_end_time_current_segment = max(segment_max_end_time_current_segment, new_end_ms)
-
-                        # Update the overall last segment end time for the *next* segment's offset calculation
-                        # We should use the max end time seen in this segment
-                        last_segment_end_time_ms = segment_max_end_time_current_segment
-                        print(f"  Segment processed. Updated last_segment_end_time_ms to: {last_segment_end_time_ms}")
-
-
-                except Exception as e:
-                     print(f"Error processing individual SRT file {srt_filepath}: {e}")
-                     # Decide whether to skip or halt; skipping allows partial results
-                     continue # Skip to next file
-
-        print(f"Successfully combined SRT files into: {output_filepath}")
+        combined_entries = _iter_combined_entries(srt_files, entries_by_file)
+        if return_entries:
+            entries = list(combined_entries)
+            log.info(f"Combined {len(entries)} subtitle entries in memory")
+            return entries
+
+        with open(output_filepath, 'w', encoding='utf-8', buffering=COMBINE_WRITE_BUFFER_SIZE) as outfile:
+            write_buffer = [] # Formatted SRT blocks waiting for the next writelines()
+            for entry in combined_entries:
+                write_buffer.append(f"{entry['index']}\n{entry['start']} --> {entry['end']}\n{entry['text']}\n\n")
+                if len(write_buffer) >= COMBINE_FLUSH_ENTRIES:
+                    outfile.writelines(write_buffer)
+                    write_buffer.clear()
+            outfile.writelines(write_buffer)
+
+        log.info(f"Successfully combined SRT files into: {output_filepath}")
         return output_filepath
     except Exception as e:
-        print(f"Error combining SRT files into {output_filepath}: {e}")
+        log.error(f"Error combining SRT files into {output_filepath}: {e}")
         # Clean up potentially incomplete output file
-        if os.path.exists(output_filepath):
+        if not return_entries and os.path.exists(output_filepath):
             try:
                 os.remove(output_filepath)
             except OSError:
                  pass
         return None
 
+def _iter_combined_entries(srt_files, entries_by_file):
+    """
+    Yields the entries of the (already sorted) segment SRT files as one continuous,
+    renumbered sequence, with each segment's timestamps shifted past the previous one.
+    Files with blocks in entries_by_file are taken from memory instead of being read.
+    """
+    # The remaining segment SRTs are read in background threads a few files ahead of the one being
+    # combined, so file I/O overlaps with parsing while only COMBINE_READ_AHEAD files' text is held
+    files_to_read = [f for f in srt_files if entries_by_file.get(f) is None and f and os.path.exists(f)]
+    readable_files = set(files_to_read)
+    unscheduled_reads = iter(files_to_read)
+    pending_reads = {}
+
+    def schedule_reads():
+        while len(pending_reads) < COMBINE_READ_AHEAD:
+            srt_filepath = next(unscheduled_reads, None)
+            if srt_filepath is None:
+                return
+            pending_reads[srt_filepath] = read_executor.submit(_read_text_file, srt_filepath)
+
+    overall_subtitle_index = 1
+    time_offset_ms = 0
+    last_segment_end_time_ms = 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=COMBINE_READ_AHEAD) as read_executor:
+        schedule_reads()
+        for srt_filepath in srt_files:
+            entries = entries_by_file.get(srt_filepath)
+            if entries is None and srt_filepath not in readable_files:
+                log.warning(f"Warning: Skipping missing SRT file: {srt_filepath}")
+                continue
+
+            srt_filename = os.path.basename(srt_filepath) # Once per file, not per skipped entry
+            log.debug(f"Combining: {srt_filename}")
+            try:
+                if entries is None:
+                    srt_content = pending_reads.pop(srt_filepath).result() # Re-raises any read error here
+                    schedule_reads()
+                    # Use the streaming parser from srt_utils; entries are consumed as they're parsed
+                    entries = (
+                        (_srt_time_to_ms(entry['start']), _srt_time_to_ms(entry['end']), entry['text'])
+                        for entry in parse_srt_iter(srt_content)
+                    )
+                entries = iter(entries)
+                first_entry = next(entries, None)
+
+                if first_entry is None:
+                    log.warning(f"Warning: No entries parsed from {srt_filepath}, skipping.")
+                    continue
+
+                # Check if timestamps reset (first entry starts near 0)
+                first_entry_start_ms = first_entry[0]
+
+                # If the first subtitle starts very early, assume segment reset timestamps
+                # Add the end time of the *previous* segment as the offset.
+                if first_entry_start_ms < 1000: # If first sub is within 1 sec of 00:00:00
+                    time_offset_ms = last_segment_end_time_ms
+                    log.debug(f"  Segment reset detected. Applying offset: {time_offset_ms}ms")
+                else:
+                    # If timestamps seem continuous, don't add offset from previous segment
+                    # (This might happen if ffmpeg -reset_timestamps wasn't used or failed)
+                    time_offset_ms = 0
+                    log.debug(f"  Timestamps appear continuous (first start: {first_entry_start_ms}ms). No offset applied.")
+
+                segment_max_end_time_current_segment = 0
+                for entry_number, (start_ms, end_ms, text) in enumerate(itertools.chain((first_entry,), entries), 1):
+                    # Add offset, convert back
+                    new_start_ms = start_ms + time_offset_ms
+                    new_end_ms = end_ms + time_offset_ms
+
+                    # Basic check for validity
+                    if new_start_ms >= new_end_ms:
+                        log.warning(f"  Warning: Skipping entry {entry_number} of {srt_filename} due to invalid time after offset: {new_start_ms} >= {new_end_ms}")
+                        continue
+
+                    yield {
+                        'index': overall_subtitle_index,
+                        'start': _ms_to_srt_time(new_start_ms),
+                        'end': _ms_to_srt_time(new_end_ms),
+                        'text': text.strip(),
+                    }
+                    overall_subtitle_index += 1
+
+                    # Track the maximum end time *within this segment* after applying offset
+                    if new_end_ms > segment_max_end_time_current_segment:
+                        segment_max_end_time_current_segment = new_end_ms
+
+                # Update the overall last segment end time for the *next* segment's offset calculation
+                # We should use the max end time seen in this segment
+                last_segment_end_time_ms = segment_max_end_time_current_segment
+                log.debug(f"  Segment processed. Updated last_segment_end_time_ms to: {last_segment_end_time_ms}")
+
+            except Exception as e:
+                log.error(f"Error processing individual SRT file {srt_filepath}: {e}")
+                # Decide whether to skip or halt; skipping allows partial results
+                continue # Skip to next file
+
 # --- Main Processing Function ---
 def process_audio(
     input_path,               # URL or local file path
@@ -331,16 +744,23 @@ def process_audio(
     model_name,               # e.g., "whisper-large-v3"
     language,                 # Language code (e.g., "ja", "en")
     status_callback,          # Function to update GUI status
-    lengthen_subtitles_flag,  # Boolean
-    delete_segments_flag,     # Boolean
-    delete_temp_audio_flag,   # Boolean (for downloaded audio)
-    delete_segment_srts_flag  # Boolean
+    flags,                    # Bitmask of FLAG_* options
+    max_parallel_segments=DEFAULT_MAX_PARALLEL_SEGMENTS,  # Segments transcribed concurrently
+    failed_segments=None      # Optional list; names of segments that failed to transcribe are appended
 ):
     """
-    Main workflow: Processes audio (URL/file), segments, transcribes (handling verbose_json),
-    combines with timestamp adjustment, optionally lengthens, optionally cleans up.
-    Returns True on success, False on failure.
+    Main workflow: Processes audio (URL/file), segments, transcribes (handling verbose_json,
+    several segments at a time), combines with timestamp adjustment, optionally lengthens,
+    optionally cleans up.
+    Returns True on success, False on failure. Success can still leave out segments that
+    failed to transcribe; pass a failed_segments list to find out which.
     """
+    lengthen_subtitles_flag = flags & FLAG_LENGTHEN
+    delete_segments_flag = flags & FLAG_DEL_SEG
+    delete_temp_audio_flag = flags & FLAG_DEL_DL
+    delete_segment_srts_flag = flags & FLAG_DEL_SEGSRT
+    downsample_audio_flag = flags & FLAG_DOWNSAMPLE
+
     output_dir = os.path.dirname(output_srt_filepath)
     final_srt_base_name = os.path.splitext(os.path.basename(output_srt_filepath))[0]
     # Use more robust temporary names
@@ -352,8 +772,11 @@ def process_audio(
     is_downloaded = False
     generated_segment_files = []
     generated_segment_srt_files = [] # Store paths of SRTs from segments
+    segment_entries = [] # In-memory blocks of each of those SRTs (None: read the file)
+    processing_succeeded = False # Intermediate audio/SRTs are only deleted after the final SRT is saved
 
-    os.makedirs(output_dir, exist_ok=True)
+    if output_dir: # A bare file name means the current directory, which already exists
+        os.makedirs(output_dir, exist_ok=True)
 
     try:
         # 1. Handle Input: Download or use local file
@@ -369,63 +792,129 @@ def process_audio(
             status_callback(f"Error: Input file not found: {input_path}")
             return False
 
-        # 2. Segment audio using FFmpeg
-        status_callback("Segmenting audio into 10-minute chunks...")
+        # 2. Segment audio using FFmpeg (unless it can be uploaded as-is)
+        input_ext = os.path.splitext(audio_to_process)[1]
+        direct_upload = (
+            not downsample_audio_flag
+            and input_ext.lower() in AUDIO_MIME_TYPES
+            and os.path.getsize(audio_to_process) < DIRECT_UPLOAD_MAX_BYTES
+        )
+        audio_info = AudioInfo(None, None) if direct_upload else _probe_audio(audio_to_process)
+        if direct_upload:
+            status_callback("Audio is small enough to upload directly; skipping segmentation.")
+            segment_ext = input_ext
+            codec_args = []
+        elif downsample_audio_flag or audio_info.codec not in ("mp3", None):
+            # Other codecs can't be stream-copied into .mp3 segments, so they get the compact re-encode too
+            status_callback("Segmenting audio into 10-minute chunks (downsampling to 16 kHz mono)...")
+            segment_ext = DOWNSAMPLE_SEGMENT_EXT
+            codec_args = DOWNSAMPLE_FFMPEG_ARGS # Re-encode once here instead of uploading full-rate audio
+        else:
+            status_callback("Segmenting audio into 10-minute chunks...")
+            segment_ext = ".mp3"
+            codec_args = ["-c", "copy", *SEGMENT_BITEXACT_ARGS] # MP3 input (or unknown codec): stream copy, no decode/re-encode
         # Use a specific prefix related to the output name
-        segment_prefix = os.path.join(output_dir, f"{final_srt_base_name}_segment_%03d.mp3") # %03d allows up to 999 segments
+        segment_prefix = os.path.join(output_dir, f"{final_srt_base_name}_segment_%03d{segment_ext}") # %03d allows up to 999 segments
         ffmpeg_command = [
             "ffmpeg",
+            "-hide_banner", "-loglevel", "error", # Only real problems on stderr
+            "-nostats", "-progress", "pipe:1",   # Machine-readable progress on stdout
+            "-y",  # Overwrite existing files
             "-i", audio_to_process,
             "-f", "segment",
-            "-segment_time", "600",  # 10 minutes
-            "-c", "copy", # Use copy codec for speed if input is MP3
-            segment_prefix,
+            "-segment_time", str(SEGMENT_SECONDS),  # 10 minutes
             "-reset_timestamps", "1", # Crucial for combining logic
-            "-y",  # Overwrite existing files
+            *codec_args,
+            segment_prefix, # Output last: options after it would be ignored
         ]
+        def on_ffmpeg_line(line):
+            if line.startswith("out_time="):
+                status_callback(f"  Segmenting... {line.split('=', 1)[1].split('.')[0]} of audio processed")
+            elif "=" not in line: # Anything that isn't a progress key=value pair is an ffmpeg message
+                log.info(f"FFmpeg: {line}")
+
         try:
-            print("Running FFmpeg command:", " ".join(ffmpeg_command))
-            result = subprocess.run(ffmpeg_command, check=True, capture_output=True, text=True, encoding='utf-8')
-            if result.stderr: # Check stderr for potential warnings/errors even if exit code is 0
-                 # Filter common non-error messages if needed
-                 if "deprecated pixel format" not in result.stderr.lower() and "use -pix_fmt" not in result.stderr.lower():
-                     print(f"FFmpeg stderr output:\n{result.stderr}")
-                     # status_callback(f"FFmpeg messages during segmentation. Check console.")
-            status_callback("Audio segmentation complete.")
+            groq_loop, groq_client = _get_groq_client()
+        except Exception as e:
+            status_callback("Error: Groq client not initialized. Check API key and environment variables.")
+            log.error(f"ERROR: Failed to initialize Groq client: {e}")
+            return False
+
+        # Inputs with a known duration are cut chunk by chunk in parallel, and each chunk is
+        # uploaded as soon as it is cut. Otherwise fall back to one sequential pass through
+        # ffmpeg's segment muxer and start transcribing once it has finished.
+        cut_segment = None
+        segment_srt_paths = None
+        duration = audio_info.duration
+        try:
+            if direct_upload:
+                # Small enough for one request: transcribe the file itself, no ffmpeg pass at all.
+                # It is never added to generated_segment_files, so cleanup can't delete the input.
+                segment_files = [audio_to_process]
+                segment_srt_paths = [os.path.join(output_dir, f"{final_srt_base_name}_segment_000.srt")]
+            elif duration:
+                segment_count = max(1, math.ceil(duration / SEGMENT_SECONDS))
+                generated_segment_files = segment_files = [segment_prefix % i for i in range(segment_count)]
+                cut_segment = functools.partial(_cut_segment, audio_to_process, codec_args=codec_args, segment_count=segment_count)
+                log.info(f"Cutting {duration:.0f}s of audio into {segment_count} segments while transcribing")
+            else:
+                log.info("Running FFmpeg command: %s", " ".join(ffmpeg_command))
+                _run_streaming(ffmpeg_command, on_ffmpeg_line)
+                status_callback("Audio segmentation complete.")
+
+                # ffmpeg numbers segments 000, 001, ... without gaps: take them in order until one is missing
+                generated_segment_files = list(itertools.takewhile(os.path.exists, (segment_prefix % i for i in itertools.count())))
+                if not generated_segment_files:
+                     status_callback("Error: No audio segments were created by ffmpeg.")
+                     log.info(f"Looked for segments named {os.path.basename(segment_prefix)} in {output_dir}")
+                     return False
+                log.info(f"Found segments: {[os.path.basename(f) for f in generated_segment_files]}")
+                segment_files = generated_segment_files
+
+            # 3. Transcribe segments concurrently (each one is an independent, network-bound Groq call)
+            total_segments = len(segment_files)
+            parallel_segments = max(1, min(int(max_parallel_segments), MAX_PARALLEL_SEGMENTS_CAP, total_segments))
+            if int(max_parallel_segments) > MAX_PARALLEL_SEGMENTS_CAP:
+                log.warning(f"Requested {max_parallel_segments} parallel segments; GROQ_MAX_PARALLEL_SEGMENTS caps it at {MAX_PARALLEL_SEGMENTS_CAP}")
+            status_callback(f"Transcribing {total_segments} segments ({parallel_segments} at a time)...")
+            completed_segments = 0
+            segment_names = [os.path.basename(f) for f in segment_files] # Once, not per status update
+
+            def on_segment_done(i, srt_path):
+                nonlocal completed_segments
+                completed_segments += 1
+                segment_name = segment_names[i]
+                if srt_path:
+                    status_callback(StatusMessage("info", "Transcribed segment %d/%d (%d/%d done): %s", (i + 1, total_segments, completed_segments, total_segments, segment_name)))
+                elif os.path.getsize(segment_files[i]) < MIN_SEGMENT_BYTES:
+                    status_callback(StatusMessage("info", "Skipping near-empty segment: %s", (segment_name,)))
+                else:
+                    status_callback(StatusMessage("error", "Error transcribing %s. Skipping segment. Check console.", (segment_name,)))
+                    log.error(f"Failed to transcribe {segment_name}, skipping.")
+                    if failed_segments is not None:
+                        failed_segments.append(segment_name)
+
+            # Runs on the shared upload loop; this (worker) thread waits. Results come back in segment order
+            segment_srt_results = asyncio.run_coroutine_threadsafe(transcribe_segments_async(
+                groq_client, segment_files, output_dir, model_name, language, parallel_segments, on_segment_done,
+                cut_segment=cut_segment, srt_paths=segment_srt_paths,
+            ), groq_loop).result()
+            for srt_path, entries in segment_srt_results:
+                if srt_path:
+                    generated_segment_srt_files.append(srt_path)
+                    segment_entries.append(entries)
         except subprocess.CalledProcessError as e:
             status_callback(f"Error during segmentation: FFmpeg failed. Check console.")
-            print(f"FFmpeg Error stdout: {e.stdout}")
-            print(f"FFmpeg Error stderr: {e.stderr}")
+            log.error(f"FFmpeg Error output:\n{e.output}")
             return False
         except FileNotFoundError:
             status_callback("Error: 'ffmpeg' command not found. Make sure it's installed and in your system's PATH.")
-            print("Error: 'ffmpeg' command not found.")
+            log.error("Error: 'ffmpeg' command not found.")
             return False
         except Exception as e:
              status_callback(f"Unexpected error during segmentation: {e}")
-             print(f"Unexpected segmentation error: {e}")
-             return False
-
-        # Find generated segments (use the pattern from ffmpeg command)
-        segmented_files_pattern = os.path.join(output_dir, f"{final_srt_base_name}_segment_*.mp3")
-        generated_segment_files = sorted(glob.glob(segmented_files_pattern))
-        if not generated_segment_files:
-             status_callback("Error: No audio segments were created by ffmpeg.")
-             print(f"Looked for segments matching: {segmented_files_pattern}")
+             log.error(f"Unexpected segmentation error: {e}")
              return False
-        print(f"Found segments: {[os.path.basename(f) for f in generated_segment_files]}")
-
-        # 3. Transcribe segments one by one
-        total_segments = len(generated_segment_files)
-        for i, audio_seg_file in enumerate(generated_segment_files):
-            status_callback(f"Transcribing segment {i+1}/{total_segments}: {os.path.basename(audio_seg_file)}...")
-            # Pass the selected language to the transcription function
-            srt_path = process_audio_segment(audio_seg_file, output_dir, model_name, language)
-            if srt_path:
-                generated_segment_srt_files.append(srt_path) # Add path of the generated SRT
-            else:
-                status_callback(f"Error transcribing {os.path.basename(audio_seg_file)}. Skipping segment. Check console.")
-                print(f"Failed to transcribe {os.path.basename(audio_seg_file)}, skipping.")
 
         # 4. Combine Segment SRT files (Adjusting Timestamps)
         if not generated_segment_srt_files:
@@ -433,43 +922,46 @@ def process_audio(
             return False
 
         status_callback("Combining transcribed SRT segments (adjusting timestamps)...")
-        # Combine into the temporary raw combined path
-        combined_success = combine_srt_files(generated_segment_srt_files, output_dir, temp_combined_srt_path)
-
-        if not combined_success:
-            status_callback("Error combining SRT files.")
-            return False
-        status_callback("SRT segments combined successfully.")
-
-
-        # 5. Lengthen subtitles (Optional) - Operates on the combined file
         final_srt_to_rename = temp_combined_srt_path # Start with the raw combined path
         if lengthen_subtitles_flag:
+            # Keep the combined entries in memory and hand them straight to the merge step,
+            # instead of writing the raw combined SRT only to read and re-parse it
+            combined_entries = combine_srt_files(generated_segment_srt_files, output_dir, temp_combined_srt_path, return_entries=True, presorted=True, segment_entries=segment_entries)
+            if combined_entries is None:
+                status_callback("Error combining SRT files.")
+                return False
+            status_callback("SRT segments combined successfully.")
+
+            # 5. Lengthen subtitles (Optional) - Operates on the combined entries
             status_callback("Lengthening subtitles (merging short blocks)...")
             try:
-                with open(temp_combined_srt_path, "r", encoding="utf-8") as f_in:
-                    raw_srt_content = f_in.read()
-
-                # Use srt_utils functions here
-                parsed_data = parse_srt(raw_srt_content)
-                if not parsed_data:
+                if not combined_entries:
                      status_callback("Warning: Could not parse combined SRT for lengthening. Skipping lengthening.")
-                     print("Warning: parse_srt returned no entries from combined file. Skipping lengthening.")
+                     log.warning("Warning: No combined entries to lengthen. Skipping lengthening.")
+                     output_srt_content = format_srt(combined_entries)
+                     output_srt_path = temp_combined_srt_path
                 else:
-                    merged_data = merge_subtitles(parsed_data, min_chars=45) # Default 45 chars
-                    output_srt_lengthened = format_srt(merged_data)
-
-                    # Write lengthened data to a *different* temp file
-                    with open(temp_lengthened_srt_path, "w", encoding="utf-8") as f_out:
-                        f_out.write(output_srt_lengthened)
-
-                    status_callback("Subtitles lengthened.")
-                    final_srt_to_rename = temp_lengthened_srt_path # Update the path to be renamed
-
+                    output_srt_content = format_merged_srt(combined_entries, min_chars=45) # Default 45 chars; merge and format in one pass
+                    output_srt_path = temp_lengthened_srt_path
             except Exception as e:
                 status_callback(f"Error lengthening subtitles: {e}. Using un-lengthened version.")
-                print(f"Error lengthening subtitles: {e}")
-                # Keep final_srt_to_rename as temp_combined_srt_path
+                log.error(f"Error lengthening subtitles: {e}")
+                output_srt_content = format_srt(combined_entries)
+                output_srt_path = temp_combined_srt_path
+
+            # Write lengthened data to a *different* temp file (or the raw combined one on fallback)
+            with open(output_srt_path, "w", encoding="utf-8") as f_out:
+                f_out.write(output_srt_content)
+            if output_srt_path == temp_lengthened_srt_path:
+                status_callback("Subtitles lengthened.")
+            final_srt_to_rename = output_srt_path # Update the path to be renamed
+        else:
+            # Combine into the temporary raw combined path
+            combined_success = combine_srt_files(generated_segment_srt_files, output_dir, temp_combined_srt_path, presorted=True, segment_entries=segment_entries)
+            if not combined_success:
+                status_callback("Error combining SRT files.")
+                return False
+            status_callback("SRT segments combined successfully.")
 
         # 6. Rename the final temporary SRT file to the desired output filename
         status_callback(f"Saving final SRT to: {output_srt_filepath}")
@@ -479,79 +971,96 @@ def process_audio(
                  status_callback(f"Error: Intermediate SRT file '{os.path.basename(final_srt_to_rename)}' not found before final rename.")
                  return False
 
-            # If the final destination file exists, remove it first
-            if os.path.exists(output_srt_filepath):
-                os.remove(output_srt_filepath)
-
-            os.rename(final_srt_to_rename, output_srt_filepath)
+            # Atomically overwrites any existing destination file
+            os.replace(final_srt_to_rename, output_srt_filepath)
             status_callback(f"Successfully processed audio and saved SRT to: {output_srt_filepath}")
+            processing_succeeded = True
             return True # Indicate overall success
 
         except OSError as e:
             status_callback(f"Error saving final SRT file: {e}")
-            print(f"Error renaming '{final_srt_to_rename}' to '{output_srt_filepath}': {e}")
+            log.error(f"Error renaming '{final_srt_to_rename}' to '{output_srt_filepath}': {e}")
             # Try to keep the intermediate file if renaming fails
             status_callback(f"Keeping intermediate SRT file: {final_srt_to_rename}")
             return False
 
     except Exception as e:
         status_callback(f"An critical error occurred during processing: {e}")
-        print(f"CRITICAL PROCESSING Error: {e}")
-        import traceback
-        traceback.print_exc() # Print full traceback for debugging
+        log.exception(f"CRITICAL PROCESSING Error: {e}") # Includes the full traceback for debugging
         return False
 
     finally:
-        # 7. Cleanup Intermediate Files (always attempt cleanup)
+        # 7. Cleanup Intermediate Files
         status_callback("Cleaning up intermediate files...")
-        cleaned_count = 0
-
-        # Delete segment MP3 files
-        if delete_segments_flag:
-            for f in generated_segment_files:
-                if os.path.exists(f):
-                    try:
-                        os.remove(f)
-                        cleaned_count += 1
-                    except OSError as e:
-                        print(f"Warning: Could not delete segment file {f}: {e}")
-            status_callback(f"Cleaned up {cleaned_count} segment MP3 files.")
-            cleaned_count = 0
+        if not processing_succeeded and (delete_segments_flag or delete_segment_srts_flag or delete_temp_audio_flag):
+            # Kept for inspection; a retry re-cuts the segments but gets unchanged ones from the segment response cache
+            status_callback("Keeping downloaded audio and segment files because processing did not finish.")
+
+        # Delete segment audio files (.mp3 or .ogg)
+        if delete_segments_flag and processing_succeeded:
+            cleaned_count = _delete_files(generated_segment_files, "segment file")
+            status_callback(f"Cleaned up {cleaned_count} segment audio files.")
 
         # Delete individual segment SRT files
-        if delete_segment_srts_flag:
-            for f in generated_segment_srt_files:
-                 if os.path.exists(f):
-                    try:
-                        os.remove(f)
-                        cleaned_count += 1
-                    except OSError as e:
-                        print(f"Warning: Could not delete segment SRT file {f}: {e}")
+        if delete_segment_srts_flag and processing_succeeded:
+            cleaned_count = _delete_files(generated_segment_srt_files, "segment SRT file")
             status_callback(f"Cleaned up {cleaned_count} segment SRT files.")
-            cleaned_count = 0
 
         # Delete downloaded audio file (if applicable)
-        if is_downloaded and delete_temp_audio_flag and os.path.exists(temp_downloaded_audio_file):
-            try:
-                os.remove(temp_downloaded_audio_file)
-                status_callback("Cleaned up downloaded audio file.")
-            except OSError as e:
-                print(f"Warning: Could not delete downloaded audio file {temp_downloaded_audio_file}: {e}")
+        if is_downloaded and delete_temp_audio_flag and processing_succeeded and _delete_files([temp_downloaded_audio_file], "downloaded audio file"):
+            status_callback("Cleaned up downloaded audio file.")
 
         # --- Delete temporary combined files ---
-        # Delete raw combined file if it exists AND wasn't the one successfully renamed
-        if os.path.exists(temp_combined_srt_path) and temp_combined_srt_path != output_srt_filepath:
-            try:
-                os.remove(temp_combined_srt_path)
-            except OSError as e:
-                 print(f"Warning: Could not delete intermediate raw combined SRT {temp_combined_srt_path}: {e}")
-        # Delete lengthened combined file if it exists AND wasn't the one successfully renamed
-        if os.path.exists(temp_lengthened_srt_path) and temp_lengthened_srt_path != output_srt_filepath:
-             try:
-                 os.remove(temp_lengthened_srt_path)
-             except OSError as e:
-                  print(f"Warning: Could not delete intermediate lengthened SRT {temp_lengthened_srt_path}: {e}")
+        # Delete raw/lengthened combined files if they exist AND weren't the one successfully renamed
+        _delete_files(
+            [f for f in (temp_combined_srt_path, temp_lengthened_srt_path) if f != output_srt_filepath],
+            "intermediate combined SRT",
+        )
 
         status_callback("Cleanup finished.")
         # The function returns True/False based on processing success before cleanup
-        
\ No newline at end of file
+
+def _delete_files(filepaths, description, max_workers=4):
+    """Deletes the given files in parallel, ignoring missing ones. Returns how many were removed."""
+    def delete(filepath):
+        try:
+            Path(filepath).unlink() # Single syscall; a missing file is not an error
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            log.warning(f"Warning: Could not delete {description} {filepath}: {e}")
+            return False
+
+    if len(filepaths) <= 1:
+        return sum(map(delete, filepaths))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(delete, filepaths))
+
+# --- Cached Entry Point ---
+def process_audio_cached(input_path, output_srt_filepath, model_name, language, flags, max_parallel_segments, status_callback):
+    """Runs process_audio for one input, reusing a cached transcript when available. Returns True on success."""
+    # Identical audio + settings: reuse the previous transcript instead of calling Groq
+    status_callback("Checking transcript cache...")
+    cache_path = get_transcript_cache_path(input_path, model_name, language, flags)
+    if load_cached_transcript(cache_path, output_srt_filepath):
+        status_callback(f"Using cached transcript: {cache_path}")
+        return True
+
+    failed_segments = []
+    success = process_audio(
+        input_path=input_path,
+        output_srt_filepath=output_srt_filepath,
+        model_name=model_name,
+        language=language,
+        status_callback=status_callback,
+        flags=flags,
+        max_parallel_segments=max_parallel_segments,
+        failed_segments=failed_segments
+    )
+    if success and failed_segments:
+        # An incomplete transcript must not be served on later runs; the next run retries those segments
+        status_callback(f"Warning: Not caching transcript; {len(failed_segments)} segment(s) failed to transcribe.")
+    elif success:
+        store_cached_transcript(cache_path, output_srt_filepath)
+    return success
@@ -0,0 +1,40 @@
+# rate_limit.py
+import asyncio
+import threading
+import time
+
+class TokenBucket:
+    """
+    Token bucket allowing rate_per_min acquisitions per minute, with bursts of up to
+    `burst`. Thread-safe, and shared between threads and event loops: each caller reserves
+    a token under a lock and then sleeps (or awaits) until its token is due, so waiters are
+    served in arrival order.
+    """
+
+    def __init__(self, rate_per_min, burst=1):
+        self.rate_per_sec = max(1, rate_per_min) / 60.0
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes one token and returns how many seconds the caller must wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate_per_sec)
+            self._last = now
+            self._tokens -= 1 # May go negative: later callers queue up behind this reservation
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_sec
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        """Waits on the event loop until a token is available."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
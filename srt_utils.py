@@ -1,77 +1,103 @@
 # srt_utils.py
 import re
-import io
 import os
+import logging
+
+log = logging.getLogger(__name__)
+
+# Blocks are separated by a blank line (plain str.split when there are no CRs); within a block the timing line is the only thing
+# that needs a pattern, and it's matched anchored at its start (no backtracking over text)
+_SRT_BLOCK_SEP_RE = re.compile(r'\r?\n\r?\n')
+_SRT_TIMING_RE = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})\r?$')
+
+def format_timestamp(seconds: float, always_include_hours: bool = True, decimal_marker: str = ','):
+    """Converts seconds to HH:MM:SS,ms format for SRT."""
+    if not isinstance(seconds, (int, float)):
+        log.warning(f"Warning: Invalid seconds value '{seconds}' received in format_timestamp. Returning 00:00:00,000.")
+        seconds = 0.0
+    elif seconds < 0:
+        seconds = 0.0
+
+    hours, milliseconds = divmod(round(seconds * 1000.0), 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds_part, milliseconds = divmod(milliseconds, 1000)
+
+    # Force hours component for SRT standard
+    return f"{hours:02d}:{minutes:02d}:{seconds_part:02d}{decimal_marker}{milliseconds:03d}"
 
 def parse_srt(srt_string):
     """Parses an SRT string into a list of subtitle entry dictionaries."""
-    entries = []
-    # More robust pattern: handles optional spaces, different line endings
-    pattern = re.compile(
-        r'(\d+)\r?\n'
-        r'(\d{2}:\d{2}:\d{2},\d{3})\s*-->\s*(\d{2}:\d{2}:\d{2},\d{3})\r?\n'
-        r'([\s\S]*?)\r?\n\r?\n',  # Match text until a blank line
-        re.MULTILINE
-    )
-    # Add a check for potential final entry without double newline
-    if not srt_string.strip().endswith('\n\n'):
-        srt_string += '\n\n'
-
-    for match in pattern.finditer(srt_string):
-        try:
-            index = int(match.group(1))
-            start_time = match.group(2)
-            end_time = match.group(3)
-            text = match.group(4).strip() # Strip leading/trailing whitespace from text block
-            if text: # Only add if text is not empty
-                entries.append({
-                    'index': index,
-                    'start': start_time,
-                    'end': end_time,
-                    'text': text
-                })
-        except Exception as e:
-            print(f"Warning: Skipping potentially malformed block near index {match.group(1) if match.group(1) else '?'} due to error: {e}")
-            # Attempt to find the start of the block for logging
-            # block_start = match.start()
-            # print(f"Problematic block content preview:\n---\n{srt_string[block_start:block_start+100]}\n---")
-    return entries
+    return list(parse_srt_iter(srt_string))
+
+def parse_srt_iter(srt_string):
+    """Like parse_srt, but yields the subtitle entry dictionaries one at a time."""
+    # Linear pass: split on blank lines, then read index / timing / text off each block
+    srt_string = srt_string.lstrip('\ufeff')
+    blocks = srt_string.split('\n\n') if '\r' not in srt_string else _SRT_BLOCK_SEP_RE.split(srt_string)
+    for block in blocks:
+        lines = block.split('\n', 2)
+        index = lines[0].strip()
+        if not index: # Extra blank lines before this block
+            lines = block.lstrip('\r\n').split('\n', 2)
+            index = lines[0].strip()
+        if len(lines) < 2:
+            continue # Stray blank lines or trailing whitespace
+        timing = _SRT_TIMING_RE.match(lines[1])
+        if not index.isdecimal() or not timing:
+            continue # Not an SRT block
+        text = lines[2].strip() if len(lines) > 2 else '' # Strip leading/trailing whitespace from text block
+        if text: # Only add if text is not empty
+            yield {
+                'index': int(index),
+                'start': timing.group(1),
+                'end': timing.group(2),
+                'text': text
+            }
 
 def merge_subtitles(entries, min_chars=45):
     """
     Merges consecutive subtitle entries if the *first* entry's text
     is shorter than min_chars. Appends text and extends end time.
     """
-    if not entries:
-        return []
+    return list(iter_merged_subtitles(entries, min_chars))
 
-    merged_entries = []
-    i = 0
-    while i < len(entries):
-        current_entry = entries[i].copy() # Work with a copy
+def iter_merged_subtitles(entries, min_chars=45):
+    """Like merge_subtitles, but takes any iterable and yields the merged entries one at a time."""
+    current_entry = None
+    text_parts = []
+    text_length = 0
+    for entry in entries:
+        # Merge into the open entry while its text is still shorter than min_chars
+        if current_entry is not None and text_length < min_chars:
+            # Append text with a space if needed (only between two non-empty texts)
+            if text_length and entry['text']:
+                text_parts.append(" ")
+                text_length += 1
+            # Collect fragments and join once, instead of re-copying the growing string per merge
+            text_parts.append(entry['text'])
+            text_length += len(entry['text'])
+            current_entry['end'] = entry['end'] # Update end time to the end of the merged block
+            continue
 
-        # Check if we need to merge based on current entry's length
-        while len(current_entry['text']) < min_chars and (i + 1) < len(entries):
-            # Merge with the next entry
-            next_entry = entries[i + 1]
-            # Append text with a space if needed (optional, adjust if you prefer no space)
-            if current_entry['text'] and next_entry['text']:
-                 current_entry['text'] += " " + next_entry['text']
-            else: # Handle cases where one text might be empty initially
-                 current_entry['text'] += next_entry['text']
+        if current_entry is not None:
+            yield _finish_merged_entry(current_entry, text_parts)
+        current_entry = entry.copy() # Work with a copy
+        text_parts = [entry['text']]
+        text_length = len(entry['text'])
 
-            current_entry['end'] = next_entry['end'] # Update end time to the end of the merged block
-            i += 1 # Move index past the merged entry
+    if current_entry is not None:
+        yield _finish_merged_entry(current_entry, text_parts)
 
-        merged_entries.append(current_entry)
-        i += 1 # Move to the next entry to evaluate
-
-    return merged_entries
+def _finish_merged_entry(entry, text_parts):
+    """Sets a merged entry's text from its collected fragments and returns it."""
+    if len(text_parts) > 1:
+        entry['text'] = "".join(text_parts)
+    return entry
 
 
 def format_srt(merged_entries):
     """Formats a list of merged entries back into an SRT string."""
-    output = io.StringIO()
+    blocks = []
     for i, entry in enumerate(merged_entries, 1):
         # Ensure start/end times are strings in the correct format (they should be)
         start_time = entry.get('start', '00:00:00,000')
@@ -81,14 +107,20 @@ def format_srt(merged_entries):
         if not text: # Skip entries with no text after potential merging/stripping
              continue
 
-        output.write(str(i) + '\n')
-        output.write(f"{start_time} --> {end_time}\n")
-        # Ensure text doesn't end with multiple newlines before the blank line
-        output.write(text + '\n\n') # Write text and the required blank line
+        # One string per block: index, timing line, text and the required blank line
+        blocks.append(f"{i}\n{start_time} --> {end_time}\n{text}\n\n")
 
     # Use rstrip to remove only trailing whitespace/newlines from the whole string
     # Add one newline at the end for POSIX compliance if desired, but SRT usually just ends after the last blank line.
-    final_srt = output.getvalue().rstrip()
+    final_srt = "".join(blocks).rstrip() # join sizes the result once instead of growing a buffer
     if final_srt: # Add trailing newline only if there's content
         final_srt += '\n'
     return final_srt
+
+
+def format_merged_srt(entries, min_chars=45):
+    """
+    Same result as format_srt(merge_subtitles(entries, min_chars)), in one streaming pass:
+    entries may be any iterable, and no list of merged entries is built.
+    """
+    return format_srt(iter_merged_subtitles(entries, min_chars))
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import httpx
+from groq import AsyncGroq
+
+import audio_processing
+
+VERBOSE_JSON = {
+    "text": "Hello there. General Kenobi.",
+    "segments": [
+        {"start": 0.0, "end": 1.5, "text": " Hello there."},
+        {"start": 1.5, "end": 3.25, "text": " General Kenobi."},
+    ],
+}
+
+def _mock_client(requests):
+    """AsyncGroq whose HTTP calls are answered by httpx.MockTransport with VERBOSE_JSON."""
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json=VERBOSE_JSON)
+    return AsyncGroq(api_key="test-key", http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)), max_retries=0)
+
+class ProcessAudioSegmentAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.audio_filepath = os.path.join(self.output_dir, "talk_segment_000.mp3")
+        with open(self.audio_filepath, "wb") as f:
+            f.write(os.urandom(audio_processing.MIN_SEGMENT_BYTES))
+        self.requests = []
+        self.client = _mock_client(self.requests)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    async def test_transcribes_through_the_sdk(self):
+        srt_path, entries = await audio_processing.process_audio_segment_async(
+            self.client, self.audio_filepath, self.output_dir, "whisper-large-v3", "ja"
+        )
+        self.assertEqual(len(self.requests), 1)
+        self.assertTrue(self.requests[0].url.path.endswith("/audio/transcriptions"))
+        self.assertEqual(entries, [(0, 1500, "Hello there."), (1500, 3250, "General Kenobi.")])
+        with open(srt_path, encoding="utf-8") as f:
+            self.assertEqual(
+                f.read(),
+                "1\n00:00:00,000 --> 00:00:01,500\nHello there.\n\n"
+                "2\n00:00:01,500 --> 00:00:03,250\nGeneral Kenobi.\n",
+            )
+
+    async def test_second_run_uses_the_segment_cache(self):
+        for _ in range(2):
+            srt_path, _ = await audio_processing.process_audio_segment_async(
+                self.client, self.audio_filepath, self.output_dir, "whisper-large-v3", "ja"
+            )
+            self.assertIsNotNone(srt_path)
+        self.assertEqual(len(self.requests), 1)
+        cache_dir = os.path.join(self.output_dir, audio_processing.SEGMENT_CACHE_DIRNAME)
+        [cache_file] = os.listdir(cache_dir)
+        with open(os.path.join(cache_dir, cache_file), "rb") as f:
+            self.assertEqual(json.loads(f.read()), VERBOSE_JSON)
+
+class CreateAsyncHttpClientTest(unittest.TestCase):
+    def test_aiohttp_backend_gets_the_pool_limits(self):
+        with mock.patch("groq.DefaultAioHttpClient") as aiohttp_client:
+            audio_processing._create_async_http_client(16)
+        limits = aiohttp_client.call_args.kwargs["limits"]
+        self.assertEqual((limits.max_connections, limits.max_keepalive_connections), (16, 16))
+
+class CutSegmentTest(unittest.TestCase):
+    def setUp(self):
+        self.segment_path = os.path.join(tempfile.mkdtemp(), "talk_segment_001.mp3")
+        self.commands = []
+
+    def fake_ffmpeg(self, writes_output=True):
+        def run_streaming(command, on_line):
+            self.commands.append(command)
+            if writes_output:
+                open(command[-1], "wb").close()
+        return mock.patch.object(audio_processing, "_run_streaming", run_streaming)
+
+    def test_only_the_last_segment_runs_to_the_end(self):
+        with self.fake_ffmpeg():
+            audio_processing._cut_segment("talk.mp3", 1, self.segment_path, [], segment_count=3)
+            audio_processing._cut_segment("talk.mp3", 2, self.segment_path, [], segment_count=3)
+        self.assertIn("-t", self.commands[0])
+        self.assertNotIn("-t", self.commands[1])
+
+    def test_missing_output_is_not_reported_as_missing_ffmpeg(self):
+        with self.fake_ffmpeg(writes_output=False), self.assertRaisesRegex(RuntimeError, "no output for segment 001"):
+            audio_processing._cut_segment("talk.mp3", 1, self.segment_path, [], segment_count=3)
+
+class TranscribeSegmentsAsyncTest(unittest.IsolatedAsyncioTestCase):
+    async def test_cut_failure_cancels_the_other_segments(self):
+        output_dir = tempfile.mkdtemp()
+        segment_files = [os.path.join(output_dir, f"talk_segment_{i:03d}.mp3") for i in range(3)]
+        upload_started = asyncio.Event()
+
+        async def slow_handler(request):
+            upload_started.set()
+            await asyncio.sleep(60)
+            return httpx.Response(200, json=VERBOSE_JSON)
+
+        def cut_segment(index, segment_path):
+            if index == 2:
+                asyncio.run_coroutine_threadsafe(upload_started.wait(), loop).result()
+                raise RuntimeError("cut failed")
+            with open(segment_path, "wb") as f:
+                f.write(os.urandom(audio_processing.MIN_SEGMENT_BYTES))
+
+        loop = asyncio.get_running_loop()
+        done = []
+        client = AsyncGroq(api_key="test-key", http_client=httpx.AsyncClient(transport=httpx.MockTransport(slow_handler)), max_retries=0)
+        try:
+            with self.assertRaisesRegex(RuntimeError, "cut failed"):
+                await asyncio.wait_for(audio_processing.transcribe_segments_async(
+                    client, segment_files, output_dir, "whisper-large-v3", "ja", 4,
+                    lambda index, srt_path: done.append(index), cut_segment=cut_segment,
+                ), timeout=10)
+        finally:
+            await client.close()
+        self.assertEqual(done, [])
+        self.assertEqual(asyncio.all_tasks(), {asyncio.current_task()})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import unittest
+
+from srt_utils import format_merged_srt, format_srt, merge_subtitles, parse_srt, parse_srt_iter
+
+SAMPLE_SRT = """1
+00:00:00,000 --> 00:00:01,000
+Hi
+
+2
+00:00:01,000 --> 00:00:02,500
+there
+
+3
+00:00:03,000 --> 00:00:06,000
+This line is already long enough to stand on its own.
+
+4
+00:00:06,000 --> 00:00:07,000
+Bye
+"""
+
+TWO_CUES_SRT = "1\n00:00:00,000 --> 00:00:01,000\nHi\n\n2\n00:00:01,000 --> 00:00:02,500\nthere\nsecond line\n"
+# What the original regex-based parse_srt returned for TWO_CUES_SRT
+TWO_CUES = [
+    {'index': 1, 'start': "00:00:00,000", 'end': "00:00:01,000", 'text': "Hi"},
+    {'index': 2, 'start': "00:00:01,000", 'end': "00:00:02,500", 'text': "there\nsecond line"},
+]
+
+class ParseSrtIterTest(unittest.TestCase):
+    def assertParses(self, srt_string, expected):
+        self.assertEqual(list(parse_srt_iter(srt_string)), expected)
+
+    def test_plain(self):
+        self.assertParses(TWO_CUES_SRT, TWO_CUES)
+
+    def test_crlf_line_endings(self):
+        self.assertParses(TWO_CUES_SRT.replace("\n", "\r\n"), [
+            dict(TWO_CUES[0]),
+            dict(TWO_CUES[1], text="there\r\nsecond line"),
+        ])
+
+    def test_utf8_bom(self):
+        self.assertParses("\ufeff" + TWO_CUES_SRT, TWO_CUES)
+        self.assertParses("\ufeff" + TWO_CUES_SRT.replace("\n", "\r\n"), parse_srt(TWO_CUES_SRT.replace("\n", "\r\n")))
+
+    def test_repeated_blank_lines(self):
+        self.assertParses(TWO_CUES_SRT.replace("\n\n2", "\n\n\n\n2") + "\n\n\n", TWO_CUES)
+
+    def test_missing_trailing_newline(self):
+        self.assertParses(TWO_CUES_SRT.rstrip("\n"), TWO_CUES)
+
+    def test_multi_line_text(self):
+        self.assertParses("1\n00:00:00,000 --> 00:00:01,000\nline one\nline two\nline three\n", [
+            {'index': 1, 'start': "00:00:00,000", 'end': "00:00:01,000", 'text': "line one\nline two\nline three"},
+        ])
+
+    def test_skips_malformed_blocks(self):
+        self.assertParses("x\n00:00:00,000 --> 00:00:01,000\nbad index\n\n" + TWO_CUES_SRT, TWO_CUES)
+        self.assertParses("1\n00:00:00 --> 00:00:01\nbad timing\n\n" + TWO_CUES_SRT, TWO_CUES)
+        self.assertParses("hello world\n\n" + TWO_CUES_SRT + "\ntrailing junk\n", TWO_CUES)
+
+    def test_empty_cue_does_not_swallow_the_next_one(self):
+        # The regex parser read the following cue as the empty cue's text; this is the one
+        # deliberate difference from it
+        self.assertParses("1\n00:00:00,000 --> 00:00:01,000\n\n2\n00:00:01,000 --> 00:00:02,000\nok\n", [
+            {'index': 2, 'start': "00:00:01,000", 'end': "00:00:02,000", 'text': "ok"},
+        ])
+
+class MergeSubtitlesTest(unittest.TestCase):
+    def test_merges_short_entries_into_the_first(self):
+        merged = merge_subtitles(parse_srt(SAMPLE_SRT), min_chars=10)
+        self.assertEqual(
+            [(e['start'], e['end'], e['text']) for e in merged],
+            [
+                ("00:00:00,000", "00:00:06,000", "Hi there This line is already long enough to stand on its own."),
+                ("00:00:06,000", "00:00:07,000", "Bye"),
+            ],
+        )
+
+    def test_does_not_modify_the_input(self):
+        entries = parse_srt(SAMPLE_SRT)
+        merge_subtitles(entries, min_chars=10)
+        self.assertEqual(entries, parse_srt(SAMPLE_SRT))
+
+    def test_no_space_next_to_empty_text(self):
+        entries = [
+            {'start': "a", 'end': "b", 'text': ""},
+            {'start': "b", 'end': "c", 'text': "x"},
+            {'start': "c", 'end': "d", 'text': ""},
+        ]
+        self.assertEqual([e['text'] for e in merge_subtitles(entries, min_chars=5)], ["x"])
+
+class FormatMergedSrtTest(unittest.TestCase):
+    def test_matches_format_srt_of_merge_subtitles(self):
+        texts = ["", "x", "hello world", " padded ", "y" * 50, "ab"]
+        for min_chars in (0, 1, 5, 12, 45, 100):
+            for offset in range(len(texts)):
+                entries = [
+                    {'index': i + 1, 'start': f"00:00:{i:02d},000", 'end': f"00:00:{i + 1:02d},000", 'text': texts[(i + offset) % len(texts)]}
+                    for i in range(9)
+                ]
+                with self.subTest(min_chars=min_chars, offset=offset):
+                    self.assertEqual(
+                        format_merged_srt(iter(entries), min_chars),
+                        format_srt(merge_subtitles(entries, min_chars)),
+                    )
+
+    def test_empty_input(self):
+        self.assertEqual(format_merged_srt([]), "")
+        self.assertEqual(merge_subtitles([]), [])
+
+if __name__ == "__main__":
+    unittest.main()